@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from incremental import serialize_structure
+from sdf_parser import parse_structure
+from spec_hash import annotate
+
+
+def _parse_job(job):
+    key, source, element_name, backend, keep_raw = job
+    kind, value, encoding = source
+    try:
+        if kind == "path":
+            # 只传缓存文件路径，由子进程自己读取，避免在进程间传递整页 HTML
+            with open(value, "rb") as f:
+                content = f.read().decode(encoding, errors="replace")
+        else:
+            content = value
+        struct = parse_structure(content, element_name, backend, keep_raw)
+        # 返回序列化好的文件内容（一个字符串），而不是让 pickle 处理整棵嵌套 dict
+        return key, serialize_structure(annotate(struct)) if struct else "", None
+    except Exception as e:
+        # 单个页面失败不影响其余页面，与 crawl() 的约定一致
+        return key, None, e
+
+
+def page_source(url, content, cached):
+    """构造交给子进程的页面来源：有缓存文件时只传路径，否则传文本本身。"""
+    if cached is not None:
+        path, encoding = cached
+        return ("path", path, encoding)
+    return ("text", content, None)
+
+
+def parse_pages(jobs, workers=None, backend=None, keep_raw=False):
+    """在进程池中批量解析页面。
+
+    jobs 是 [(key, source, element_name), ...]，source 由 page_source 构造。
+    返回与 jobs 同序的 [(key, text, error), ...]（同 crawl()）：text 是 structure_<name>.json 的内容
+    （没有结构时为 ""），与单进程写出的内容逐字节相同；解析失败时 text 为 None，error 为异常。
+    """
+    jobs = [(key, source, name, backend, keep_raw) for key, source, name in jobs]
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) == 1:
+        return [_parse_job(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_parse_job, jobs, chunksize=chunksize))
@@ -0,0 +1,89 @@
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+PAGE_CONTENT_PATH = PROJECT_ROOT / "outputs" / "raw" / "page_content.html"
+CACHE_OBJECTS_DIR = PROJECT_ROOT / "data" / "cache" / "http" / "objects"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sdf_parser import BACKENDS, parse_structure_stream, parse_tree
+
+# 流式解析按这些块大小切分页面，每种切分都必须与 html.parser 的结果相同
+STREAM_CHUNK_SIZES = (1, 7, 256, 4096)
+
+
+def load_pages(paths):
+    """默认使用 outputs/raw/page_content.html 以及响应缓存里所有含 tree well 的页面。"""
+    if not paths:
+        paths = [PAGE_CONTENT_PATH]
+        if CACHE_OBJECTS_DIR.exists():
+            paths.extend(sorted(p for p in CACHE_OBJECTS_DIR.glob("*/*") if p.is_file()))
+    pages = []
+    for path in paths:
+        text = Path(path).read_text(encoding="utf-8", errors="replace")
+        if "tree well" in text:
+            pages.append((Path(path), text))
+    return pages
+
+
+def chunked(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def parse_stream(text, size=STREAM_CHUNK_SIZES[-1]):
+    """parse_structure_stream 的结果；select_roots 找不到同名根节点时原样返回顶层列表，与 parse_tree 可比。"""
+    return parse_structure_stream(chunked(text, size), "")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Check that every parser backend matches html.parser and measure pages/sec.")
+    parser.add_argument("pages", nargs="*", type=Path, help="HTML pages to parse (default: page_content.html + cached pages)")
+    parser.add_argument("--repeat", type=int, default=20, help="How many times each page is parsed per backend")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print("No pages with a tree well found.")
+        return 1
+    total_bytes = sum(len(text) for _, text in pages)
+    print(f"{len(pages)} pages, {total_bytes / 1024:.0f} KiB, {args.repeat} repeats")
+
+    reference = [parse_tree(text, "html.parser") for _, text in pages]
+    ok = True
+    print(f"{'backend':<12} {'identical':<10} {'pages/sec':>10} {'MiB/sec':>9} {'speedup':>8}")
+    baseline = None
+    for name in BACKENDS:
+        identical = all(parse_tree(text, name) == ref for (_, text), ref in zip(pages, reference))
+        ok = ok and identical
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, text in pages:
+                parse_tree(text, name)
+        elapsed = time.perf_counter() - start
+        pages_per_sec = len(pages) * args.repeat / elapsed
+        if baseline is None:
+            baseline = pages_per_sec
+        mib_per_sec = total_bytes * args.repeat / elapsed / (1024 * 1024)
+        print(f"{name:<12} {'yes' if identical else 'NO':<10} {pages_per_sec:>10.1f} {mib_per_sec:>9.1f} {pages_per_sec / baseline:>7.2f}x")
+
+    identical = all(parse_stream(text, size) == ref
+                    for (_, text), ref in zip(pages, reference) for size in STREAM_CHUNK_SIZES)
+    ok = ok and identical
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for _, text in pages:
+            parse_stream(text)
+    elapsed = time.perf_counter() - start
+    pages_per_sec = len(pages) * args.repeat / elapsed
+    mib_per_sec = total_bytes * args.repeat / elapsed / (1024 * 1024)
+    print(f"{'stream':<12} {'yes' if identical else 'NO':<10} {pages_per_sec:>10.1f} {mib_per_sec:>9.1f} {pages_per_sec / baseline:>7.2f}x")
+
+    if not ok:
+        print("Backend output differs from html.parser!")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
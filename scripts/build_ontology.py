@@ -1,11 +1,26 @@
-import json
+import functools
+import os
 import re
-import xml.etree.ElementTree as ET
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sdf_parser import split_details
+from spec_tree import load_tree
+from ontology_binary import write_binary
+from ontology_cache import FRAGMENT_CACHE_DIR, Fragment, FragmentCache, fragment_keys
+from ontology_graph import (BASE_IRI, NAMESPACES, RDF_TYPE, OWL_CLASS, OWL_OBJECT_PROPERTY, OWL_DATATYPE_PROPERTY,
+                            OWL_ONTOLOGY, OWL_IMPORTS,
+                            Literal, Restriction, TripleStore, build_graph, fragment_tasks, sanitize_local_name)
+
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 STRUCTURE_JSON_PATH = PROJECT_ROOT / "data" / "merged" / "structure.json"
 ONTOLOGY_OUT_DIR = PROJECT_ROOT / "outputs" / "ontology"
+MODULES_DIR_NAME = "modules"
+ROOT_MODULE = "sdformat_model"
+CATALOG_NAME = "catalog-v001.xml"  # Protégé 按这个文件把 owl:imports 的 IRI 映射到本地文件
 
 # 本体前缀
 PREFIXES = """@prefix : <http://sdformat.org/spec/model#> .
@@ -19,342 +34,312 @@ PREFIXES = """@prefix : <http://sdformat.org/spec/model#> .
 
 def clean_details(raw):
     # Example: "\n Required:  1 Type:  string Default:  __default__ \n "
-    info = {}
-    
-    # 提取 Required
-    req_match = re.search(r"Required:\s*(\S+)", raw)
-    if req_match:
-        info["required"] = req_match.group(1)
-        
-    # 提取 Type
-    type_match = re.search(r"Type:\s*(.*?)(?:Default:|$)", raw)
-    if type_match:
-        info["type"] = type_match.group(1).strip()
-        
-    # 提取 Default
-    def_match = re.search(r"Default:\s*(.*)", raw)
-    if def_match:
-        info["default"] = def_match.group(1).strip()
-        
-    return info
-
-def map_xsd_type(sdf_type):
-    sdf_type = sdf_type.lower()
-    if sdf_type == "bool" or sdf_type == "boolean":
-        return "xsd:boolean"
-    elif sdf_type == "string":
-        return "xsd:string"
-    elif sdf_type in ["int", "integer", "unsigned int"]:
-        return "xsd:integer"
-    elif sdf_type in ["double", "float"]:
-        return "xsd:double"
-    elif sdf_type == "vector3":
-        return "xsd:string" # 或者定义特定类型
-    elif sdf_type == "pose":
-        return "xsd:string" # "x y z r p y"
-    elif sdf_type == "color":
-        return "xsd:string"
-    elif sdf_type == "time":
-        return "xsd:string"
-    else:
-        return "xsd:string" # Default
-
-def xsd_prefixed_to_uri(xsd_prefixed):
-    if not xsd_prefixed.startswith("xsd:"):
-        return xsd_prefixed
-    local = xsd_prefixed.split(":", 1)[1]
-    return f"http://www.w3.org/2001/XMLSchema#{local}"
-
-def sanitize_local_name(name):
-    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
-
-def build_ontology_rdfxml(structure_file, output_file):
-    with open(structure_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    ns = {
-        "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-        "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
-        "owl": "http://www.w3.org/2002/07/owl#",
-        "xsd": "http://www.w3.org/2001/XMLSchema#",
-    }
-    base = "http://sdformat.org/spec/model"
-    base_hash = f"{base}#"
-
-    for prefix, uri in ns.items():
-        ET.register_namespace(prefix, uri)
-
-    rdf_root = ET.Element(ET.QName(ns["rdf"], "RDF"))
-    ontology = ET.SubElement(rdf_root, ET.QName(ns["owl"], "Ontology"))
-    ontology.set(ET.QName(ns["rdf"], "about"), base)
-
-    classes_defined = set()
-    class_elements = {}
-    properties_defined = set()
-    property_elements = {}
-    named_subclass_defined = set()
-
-    def iri(local_name):
-        return f"{base_hash}{local_name}"
-
-    def add_comment(element, text):
-        if text is None:
-            return
-        t = str(text).strip()
-        if not t:
-            return
-        comment = ET.SubElement(element, ET.QName(ns["rdfs"], "comment"))
-        comment.text = t
-    
-    def add_label(element, text):
-        if text is None:
-            return
-        t = str(text).strip()
-        if not t:
-            return
-        label = ET.SubElement(element, ET.QName(ns["rdfs"], "label"))
-        label.text = t
-
-    def define_class(class_name, description):
-        if class_name in classes_defined:
-            return class_elements[class_name]
-        cls_el = ET.SubElement(rdf_root, ET.QName(ns["owl"], "Class"))
-        cls_el.set(ET.QName(ns["rdf"], "about"), iri(class_name))
-        add_comment(cls_el, description)
-        classes_defined.add(class_name)
-        class_elements[class_name] = cls_el
-        return cls_el
-
-    def add_named_subclass(child_class_name, parent_class_name):
-        key = (child_class_name, parent_class_name)
-        if key in named_subclass_defined:
-            return
-        child_el = define_class(child_class_name, "")
-        sub_el = ET.SubElement(child_el, ET.QName(ns["rdfs"], "subClassOf"))
-        sub_el.set(ET.QName(ns["rdf"], "resource"), iri(parent_class_name))
-        named_subclass_defined.add(key)
-
-    def define_object_property(prop_name, domain_class, range_class, description):
-        if prop_name in properties_defined:
-            return property_elements[prop_name]
-        prop_el = ET.SubElement(rdf_root, ET.QName(ns["owl"], "ObjectProperty"))
-        prop_el.set(ET.QName(ns["rdf"], "about"), iri(prop_name))
-        domain_el = ET.SubElement(prop_el, ET.QName(ns["rdfs"], "domain"))
-        domain_el.set(ET.QName(ns["rdf"], "resource"), iri(domain_class))
-        range_el = ET.SubElement(prop_el, ET.QName(ns["rdfs"], "range"))
-        range_el.set(ET.QName(ns["rdf"], "resource"), iri(range_class))
-        add_comment(prop_el, description)
-        properties_defined.add(prop_name)
-        property_elements[prop_name] = prop_el
-        return prop_el
-
-    def define_datatype_property(prop_name, domain_class, range_xsd_uri, description):
-        if prop_name in properties_defined:
-            return property_elements[prop_name]
-        prop_el = ET.SubElement(rdf_root, ET.QName(ns["owl"], "DatatypeProperty"))
-        prop_el.set(ET.QName(ns["rdf"], "about"), iri(prop_name))
-        domain_el = ET.SubElement(prop_el, ET.QName(ns["rdfs"], "domain"))
-        domain_el.set(ET.QName(ns["rdf"], "resource"), iri(domain_class))
-        range_el = ET.SubElement(prop_el, ET.QName(ns["rdfs"], "range"))
-        range_el.set(ET.QName(ns["rdf"], "resource"), range_xsd_uri)
-        add_comment(prop_el, description)
-        properties_defined.add(prop_name)
-        property_elements[prop_name] = prop_el
-        return prop_el
-
-    def add_some_values_restriction(parent_class_name, prop_local_name, child_class_name):
-        parent_el = define_class(parent_class_name, "")
-        sub_el = ET.SubElement(parent_el, ET.QName(ns["rdfs"], "subClassOf"))
-        restr_el = ET.SubElement(sub_el, ET.QName(ns["owl"], "Restriction"))
-        on_prop_el = ET.SubElement(restr_el, ET.QName(ns["owl"], "onProperty"))
-        on_prop_el.set(ET.QName(ns["rdf"], "resource"), iri(prop_local_name))
-        some_el = ET.SubElement(restr_el, ET.QName(ns["owl"], "someValuesFrom"))
-        some_el.set(ET.QName(ns["rdf"], "resource"), iri(child_class_name))
-
-    def process_node(node, parent_class_name=None):
-        node_name = node.get("name")
-        node_type = node.get("node_type")
-        description = node.get("description", "")
-        details = clean_details(node.get("details_raw", ""))
-        sdf_type = details.get("type", "")
-        children = node.get("children", [])
-
-        is_complex = len(children) > 0
-
-        if parent_class_name is None:
-            class_name = (node_name or "").capitalize()
-            if not class_name:
-                return
-            root_el = define_class(class_name, description)
-            add_label(root_el, class_name)
-            for child in children:
-                process_node(child, class_name)
-            return
-
-        if not node_name:
-            return
-
-        if is_complex:
-            safe_node_name = node_name.capitalize()
-            child_class_name = f"{parent_class_name}_{safe_node_name}"
-            child_el = define_class(child_class_name, description)
-            add_label(child_el, safe_node_name)
-            add_named_subclass(child_class_name, parent_class_name)
-
-            unique_prop_name = sanitize_local_name(f"{parent_class_name}_has_{safe_node_name}")
-            prop_el = define_object_property(
-                unique_prop_name,
-                parent_class_name,
-                child_class_name,
-                f"Property for {node_name} element",
-            )
-            add_label(prop_el, safe_node_name)
-            add_some_values_restriction(parent_class_name, unique_prop_name, child_class_name)
-
-            for child in children:
-                process_node(child, child_class_name)
+    # 旧格式的结构只有 details_raw；新格式由 sdf_parser 在抽取时直接给出字段
+    return split_details(raw)
+
+def _ttl_literal(text):
+    escaped = text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r").replace("\t", "\\t")
+    return f'"{escaped}"'
+
+@functools.lru_cache(maxsize=None)
+def _curie(iri):
+    """IRI 的前缀形式（:Model、rdfs:label）；不在已知命名空间中时写成 <iri>。"""
+    for prefix, uri in NAMESPACES.items():
+        if iri.startswith(uri) and re.fullmatch(r"[A-Za-z0-9_]+", iri[len(uri):]):
+            return f"{prefix}:{iri[len(uri):]}"
+    return f"<{iri}>"
+
+def _ttl_term(term):
+    if isinstance(term, Literal):
+        return _ttl_literal(term)
+    if isinstance(term, Restriction):
+        return (f"[ rdf:type owl:Restriction ; owl:onProperty {_curie(term.on_property)} ; "
+                f"owl:someValuesFrom {_curie(term.some_values_from)} ]")
+    return _curie(term)
+
+def _turtle_block(subject, statements):
+    """一个主语的 Turtle 块（以换行开头）：首行是 rdf:type，其余谓语各占一行（visualize_ontology.parse_ttl 依赖这种格式）。"""
+    statements = sorted(statements, key=lambda st: st[0] != RDF_TYPE)
+    lines = [f"{_ttl_term(p)} {_ttl_term(o)}" for p, o in statements]
+    block = [f"{_ttl_term(subject)} {lines[0]}"] + [f"    {line}" for line in lines[1:]]
+    return "\n" + " ;\n".join(block) + " ."
+
+RDF_NAMESPACES = {prefix: uri for prefix, uri in NAMESPACES.items() if prefix in ("owl", "rdf", "rdfs")}
+RDFXML_TAGS = {OWL_ONTOLOGY: "owl:Ontology", OWL_CLASS: "owl:Class",
+               OWL_OBJECT_PROPERTY: "owl:ObjectProperty", OWL_DATATYPE_PROPERTY: "owl:DatatypeProperty"}
+RDFXML_HEAD = ("<?xml version='1.0' encoding='utf-8'?>\n<rdf:RDF "
+               + " ".join(f'xmlns:{prefix}="{uri}"' for prefix, uri in sorted(RDF_NAMESPACES.items())) + ">\n")
+
+def _xml_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+def _xml_attr(text):
+    return (_xml_text(text).replace("\"", "&quot;")
+            .replace("\r", "&#13;").replace("\n", "&#10;").replace("\t", "&#09;"))
+
+def _rdfxml_block(subject, statements):
+    """一个主语的 RDF/XML 块，缩进与 ET.indent(space="  ") 的结果相同。"""
+    tag = next((RDFXML_TAGS[o] for p, o in statements if p == RDF_TYPE and o in RDFXML_TAGS), "rdf:Description")
+    items = [(p, o) for p, o in statements if not (p == RDF_TYPE and RDFXML_TAGS.get(o) == tag)]
+    head = f'  <{tag} rdf:about="{_xml_attr(subject)}"'
+    if not items:
+        return head + " />\n"
+    lines = [head + ">\n"]
+    for predicate, obj in items:
+        name = _curie(predicate)
+        if isinstance(obj, Literal):
+            lines.append(f"    <{name}>{_xml_text(obj)}</{name}>\n")
+        elif isinstance(obj, Restriction):
+            lines.append(f"    <{name}>\n      <owl:Restriction>\n")
+            lines.append(f'        <owl:onProperty rdf:resource="{_xml_attr(obj.on_property)}" />\n')
+            lines.append(f'        <owl:someValuesFrom rdf:resource="{_xml_attr(obj.some_values_from)}" />\n')
+            lines.append(f"      </owl:Restriction>\n    </{name}>\n")
         else:
-            xsd_type = map_xsd_type(sdf_type)
-            unique_prop_name = f"{parent_class_name}_{node_name}"
-            if node_type == "Attribute":
-                unique_prop_name += "_attr"
-            unique_prop_name = sanitize_local_name(unique_prop_name)
-            prop_el = define_datatype_property(unique_prop_name, parent_class_name, xsd_prefixed_to_uri(xsd_type), description)
-            add_label(prop_el, node_name)
-
-    for root in data:
-        process_node(root)
-
-    tree = ET.ElementTree(rdf_root)
-    if hasattr(ET, "indent"):
-        ET.indent(rdf_root, space="  ", level=0)
-    tree.write(output_file, encoding="utf-8", xml_declaration=True)
+            lines.append(f'    <{name} rdf:resource="{_xml_attr(obj)}" />\n')
+    lines.append(f"  </{tag}>\n")
+    return "".join(lines)
+
+# 输出格式 -> (文件头, 每个主语的块, 文件尾)；文件内容就是 头 + 各块 + 尾，增量构建可以直接拼接缓存的块
+BLOCK_FORMATS = {
+    "ttl": (PREFIXES, _turtle_block, ""),
+    "owl": (RDFXML_HEAD, _rdfxml_block, "</rdf:RDF>"),
+}
+
+def write_blocks(fmt, blocks, output_file):
+    """按 BLOCK_FORMATS 写出已渲染的块；块是流式写出的，不拼接整个文件。"""
+    head, _, tail = BLOCK_FORMATS[fmt]
+    with open(output_file, "w", encoding="utf-8", newline="\n") as f:
+        f.write(head)
+        for block in blocks:
+            f.write(block)
+        f.write(tail)
     print(f"Ontology saved to {output_file}")
 
+def write_turtle(store, output_file):
+    write_blocks("ttl", (_turtle_block(subject, statements) for subject, statements in store.subjects()), output_file)
+
+def write_rdfxml(store, output_file):
+    """逐个主语流式写出 RDF/XML，不构建 ElementTree，也不做整树缩进。"""
+    write_blocks("owl", (_rdfxml_block(subject, statements) for subject, statements in store.subjects()), output_file)
+
+# 输出格式 -> 写出函数；所有格式从同一个 TripleStore 写出
+EMITTERS = {
+    "ttl": write_turtle,
+    "owl": write_rdfxml,
+    "rdfb": write_binary,
+}
+
+_worker_roots = None
+
+def _init_worker(structure_file):
+    # 每个子进程只读取一次结构文件，任务里只传片段下标，避免在进程间传递子树
+    global _worker_roots
+    _worker_roots = load_tree(structure_file)
+
+def _fragment_job(task):
+    return build_graph(_worker_roots, tasks=[task])
+
+def build_fragments(structure_file, roots, tasks, workers=None):
+    """分别构建 tasks 中的每个片段，返回与 tasks 同序的 TripleStore 列表；workers > 1 时使用进程池。"""
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return [build_graph(roots, tasks=[task]) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=_init_worker,
+                             initargs=(str(structure_file),)) as pool:
+        return list(pool.map(_fragment_job, tasks))
+
+def build_graph_parallel(structure_file, workers=None):
+    """按顶层子树把结构树拆成片段，在进程池中分别构建，再按片段顺序并入一个 TripleStore。
+
+    并入顺序固定，所以输出与 build_graph 一次遍历的结果逐字节相同，与进程数无关。
+    """
+    roots = load_tree(structure_file)
+    tasks = fragment_tasks(roots)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(tasks) <= 1:
+        return build_graph(roots, tasks=tasks)
+    store = TripleStore()
+    for fragment in build_fragments(structure_file, roots, tasks, workers):
+        store.update(fragment)
+    return store
+
+def build_fragments_incremental(structure_file, roots, tasks, keys, cache, workers=1):
+    """只重新构建缓存中没有的片段（并渲染它们的块），其余片段取自 FragmentCache。
+
+    返回 (与 tasks 同序的 Fragment 列表, 重新构建的片段数)。
+    """
+    fragments = [cache.get(key) for key in keys]
+    missing = [i for i, fragment in enumerate(fragments) if fragment is None]
+    built = build_fragments(structure_file, roots, [tasks[i] for i in missing], workers)
+    renderers = {fmt: render for fmt, (_, render, _) in BLOCK_FORMATS.items()}
+    for i, store in zip(missing, built):
+        fragments[i] = Fragment.from_store(store, renderers)
+        cache.put(keys[i], fragments[i])
+    return fragments, len(missing)
+
+def _subject_places(fragments):
+    """{主语: [(片段, 下标), ...]}，按主语首次出现的顺序（与并入一个 TripleStore 时的顺序相同）。"""
+    places = {}
+    for fragment in fragments:
+        for i, subject in enumerate(fragment.subjects):
+            places.setdefault(subject, []).append((fragment, i))
+    return places
+
+def _merged_statements(owners):
+    statements = {}
+    for fragment, i in owners:
+        for p, o in fragment.statements(i):
+            # 与 TripleStore 一样按类型区分文本相同的字面量与 IRI
+            statements.setdefault((p, type(o), o), (p, o))
+    return list(statements.values())
+
+def spliced_blocks(places, fmt):
+    """按顺序给出每个主语的块：只属于一个片段的主语直接使用缓存的块；
+    出现在多个片段中的主语（本体头、根类）合并各片段的三元组后重新渲染，结果与整体构建相同。"""
+    render = BLOCK_FORMATS[fmt][1]
+    for subject, owners in places.items():
+        if len(owners) == 1:
+            fragment, i = owners[0]
+            yield fragment.blocks[fmt][i]
+        else:
+            yield render(subject, _merged_statements(owners))
+
+def spliced_store(places):
+    """由缓存的片段拼出完整的 TripleStore，供没有块缓存的格式（如 rdfb）使用。"""
+    store = TripleStore()
+    for subject, owners in places.items():
+        for p, o in _merged_statements(owners):
+            store.add(subject, p, o)
+    return store
+
+def build_all(structure_file, outputs, workers=1, incremental=False, cache_dir=FRAGMENT_CACHE_DIR):
+    """读取并遍历结构树一次，把同一组三元组写成 outputs 中的每种格式（{格式: 输出文件}）。
+
+    workers 不为 1 时按顶层子树并行构建（None 或 0 表示每个 CPU 一个进程）。
+    incremental 时只重新构建变化了的片段，其余片段的块取自缓存，直接拼接成输出（此时不返回 TripleStore）；
+    所有片段都没有变化且输出文件都在时不重写输出。
+    """
+    if incremental:
+        cache = FragmentCache(cache_dir)
+        roots = load_tree(structure_file)
+        tasks = fragment_tasks(roots)
+        keys = fragment_keys(roots, tasks)
+        paths = [str(path) for path in outputs.values()]
+        if keys == cache.previous_keys and paths == cache.previous_outputs and all(Path(path).exists() for path in paths):
+            print("Ontology unchanged")
+            return None
+        fragments, rebuilt = build_fragments_incremental(structure_file, roots, tasks, keys, cache, workers)
+        print(f"{rebuilt} of {len(keys)} fragments rebuilt")
+        places = _subject_places(fragments)
+        store = None
+        for fmt, output_file in outputs.items():
+            if fmt in BLOCK_FORMATS:
+                write_blocks(fmt, spliced_blocks(places, fmt), output_file)
+            else:
+                if store is None:
+                    store = spliced_store(places)
+                EMITTERS[fmt](store, output_file)
+        # 输出写完后才更新缓存，写出失败时下次不会误判为没有变化
+        cache.save(keys, paths)
+        return None
+    if workers == 1:
+        store = build_graph(load_tree(structure_file))
+    else:
+        store = build_graph_parallel(structure_file, workers)
+    for fmt, output_file in outputs.items():
+        EMITTERS[fmt](store, output_file)
+    return store
+
 def build_ontology(structure_file, output_file):
-    with open(structure_file, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    turtle_lines = [PREFIXES]
-    
-    # 我们需要遍历树，为每个 Complex Element 创建 Class
-    # 为每个 Simple Element 和 Attribute 创建 Property
-    
-    classes_defined = set()
-    properties_defined = set()
-    named_subclass_defined = set()
-    
-    def process_node(node, parent_class_name=None):
-        node_name = node.get("name")
-        node_type = node.get("node_type")
-        description = node.get("description", "").replace('"', '\\"')
-        details = clean_details(node.get("details_raw", ""))
-        sdf_type = details.get("type", "")
-        children = node.get("children", [])
-        
-        # 确定这是否是一个 ObjectProperty (指向 Class) 还是 DatatypeProperty
-        is_complex = len(children) > 0
-        
-        # 属性名称 (predicate)
-        # 如果 parent 是 Model, node 是 static -> :model_static ? 或者直接 :static ?
-        # 为了避免冲突，可以使用 :parent_child 命名，或者保持简单如果语义唯一。
-        # SDFormat 中很多元素名是重复的（如 name, pose），所以最好带上前缀或者使用域定义。
-        # 这里为了简单，我们使用 :has_{node_name} 作为属性名。
-        
-        prop_name = f"has_{node_name}"
-        if node_type == "Attribute":
-             prop_name = f"{node_name}_attr" # 区分 attribute 和 element
-        
-        # 如果是根节点 (Model)
-        if parent_class_name is None:
-            class_name = node_name.capitalize()
-            if class_name not in classes_defined:
-                turtle_lines.append(f":{class_name} rdf:type owl:Class ;")
-                turtle_lines.append(f"    rdfs:label \"{class_name}\" ;")
-                turtle_lines.append(f"    rdfs:comment \"{description}\" .")
-                classes_defined.add(class_name)
-            
-            # 处理子节点
-            for child in children:
-                process_node(child, class_name)
-            return
-
-        # 对于子节点
-        if is_complex:
-            # 创建新的 Class
-            # Class 名称需要唯一
-            # 使用 Parent_Child 命名
-            # 首字母大写
-            safe_node_name = node_name.capitalize()
-            child_class_name = f"{parent_class_name}_{safe_node_name}"
-            
-            if child_class_name not in classes_defined:
-                turtle_lines.append(f":{child_class_name} rdf:type owl:Class ;")
-                turtle_lines.append(f"    rdfs:label \"{safe_node_name}\" ;")
-                # 转义描述中的引号
-                safe_desc = description.replace('"', '\\"')
-                turtle_lines.append(f"    rdfs:comment \"{safe_desc}\" .")
-                classes_defined.add(child_class_name)
-
-            key = (child_class_name, parent_class_name)
-            if key not in named_subclass_defined:
-                turtle_lines.append(f":{child_class_name} rdfs:subClassOf :{parent_class_name} .")
-                named_subclass_defined.add(key)
-            
-            # 定义 ObjectProperty 连接 Parent 和 Child
-            # 使用唯一的属性名避免 Domain/Range 冲突
-            unique_prop_name = sanitize_local_name(f"{parent_class_name}_has_{safe_node_name}")
-            
-            if unique_prop_name not in properties_defined:
-                turtle_lines.append(f":{unique_prop_name} rdf:type owl:ObjectProperty ;")
-                turtle_lines.append(f"    rdfs:domain :{parent_class_name} ;")
-                turtle_lines.append(f"    rdfs:range :{child_class_name} ;")
-                turtle_lines.append(f"    rdfs:label \"{safe_node_name}\" ;")
-                turtle_lines.append(f"    rdfs:comment \"Property for {node_name} element\" .")
-                properties_defined.add(unique_prop_name)
-
-            turtle_lines.append(
-                f":{parent_class_name} rdfs:subClassOf "
-                f"[ rdf:type owl:Restriction ; owl:onProperty :{unique_prop_name} ; owl:someValuesFrom :{child_class_name} ] ."
-            )
-                
-            # 递归处理子节点的子节点
-            for child in children:
-                process_node(child, child_class_name)
-                
+    build_all(structure_file, {"ttl": output_file})
+
+def build_ontology_rdfxml(structure_file, output_file):
+    build_all(structure_file, {"owl": output_file})
+
+def module_iri(name):
+    return f"{BASE_IRI}/{name}"
+
+def module_plan(roots):
+    """把片段分到模块：(根本体的片段, {模块名: 片段})。
+
+    每个有子节点的顶层元素（model/link、model/joint、...）是一个模块 <根名>_<元素名>；
+    根类自身以及它的属性和叶子元素留在根本体中。同名的顶层元素归入同一个模块。
+    """
+    root_tasks = []
+    modules = {}
+    for task in fragment_tasks(roots):
+        root_index, child_index = task
+        root = roots[root_index]
+        child = None if child_index is None else root["children"][child_index]
+        if child is None or not child.get("children") or not child.get("name"):
+            root_tasks.append(task)
         else:
-            # Simple Element or Attribute -> DatatypeProperty
-            xsd_type = map_xsd_type(sdf_type) # 确保 map_xsd_type 函数在上面定义了
-            
-            # 属性名唯一性处理
-            # 使用 Parent_propName
-            unique_prop_name = f"{parent_class_name}_{node_name}"
-            if node_type == "Attribute":
-                unique_prop_name += "_attr"
-            
-            # 清理属性名（移除可能的非法字符）
-            unique_prop_name = re.sub(r"[^a-zA-Z0-9_]", "_", unique_prop_name)
-            
-            safe_desc = description.replace('"', '\\"')
-            safe_label = str(node_name).replace('"', '\\"')
-            
-            turtle_lines.append(f":{unique_prop_name} rdf:type owl:DatatypeProperty ;")
-            turtle_lines.append(f"    rdfs:domain :{parent_class_name} ;")
-            turtle_lines.append(f"    rdfs:range {xsd_type} ;")
-            turtle_lines.append(f"    rdfs:label \"{safe_label}\" ;")
-            turtle_lines.append(f"    rdfs:comment \"{safe_desc}\" .")
-
-    # 开始处理根节点
-    # 假设 data 是一个列表，通常只有一个根 model
-    for root in data:
-        process_node(root)
-
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(turtle_lines))
-    
-    print(f"Ontology saved to {output_file}")
+            modules.setdefault(sanitize_local_name(f"{root['name']}_{child['name']}"), []).append(task)
+    return root_tasks, modules
+
+def build_module_graphs(roots):
+    """{模块名: TripleStore}。根本体 owl:imports 所有模块；每个模块只依赖自己声明的根类，可以单独加载。"""
+    root_tasks, modules = module_plan(roots)
+    base = NAMESPACES[""]
+    store = TripleStore()
+    store.add(BASE_IRI, RDF_TYPE, OWL_ONTOLOGY)
+    for name in modules:
+        store.add(BASE_IRI, OWL_IMPORTS, module_iri(name))
+    stores = {ROOT_MODULE: build_graph(roots, store, root_tasks, ontology=None)}
+    for name, tasks in modules.items():
+        store = TripleStore()
+        store.add(module_iri(name), RDF_TYPE, OWL_ONTOLOGY)
+        for root_index in dict.fromkeys(root_index for root_index, _ in tasks):
+            store.add(base + roots[root_index]["name"].capitalize(), RDF_TYPE, OWL_CLASS)
+        stores[name] = build_graph(roots, store, tasks, ontology=None)
+    return stores
+
+def write_catalog(output_dir, names):
+    """Protégé 的 XML catalog：模块 IRI -> 同目录下的 .owl 文件。"""
+    lines = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+             '<catalog prefer="public" xmlns="urn:oasis:names:tc:entity:xmlns:xml:catalog">']
+    for name in names:
+        iri = BASE_IRI if name == ROOT_MODULE else module_iri(name)
+        lines.append(f'  <uri name="{_xml_attr(iri)}" uri="{_xml_attr(name)}.owl"/>')
+    lines.append("</catalog>")
+    with open(Path(output_dir) / CATALOG_NAME, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines) + "\n")
+
+def build_modules(structure_file, output_dir, formats=("ttl", "owl")):
+    """按顶层元素分模块写出本体：<根本体>.<格式> 与每个模块的 <模块名>.<格式>，写 .owl 时附带 catalog。"""
+    stores = build_module_graphs(load_tree(structure_file))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, store in stores.items():
+        for fmt in formats:
+            EMITTERS[fmt](store, output_dir / f"{name}.{fmt}")
+    if "owl" in formats:
+        write_catalog(output_dir, stores)
+    return stores
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the SDFormat OWL ontology (Turtle and RDF/XML) from the merged structure.")
+    parser.add_argument("structure", type=Path, nargs="?", default=STRUCTURE_JSON_PATH)
+    parser.add_argument("-o", "--output-dir", type=Path, default=ONTOLOGY_OUT_DIR)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Processes used to build top-level subtrees in parallel (0 = one per CPU); output is identical for any value")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Rebuild only the top-level subtrees whose content changed, reusing the fragment cache")
+    parser.add_argument("--cache-dir", type=Path, default=FRAGMENT_CACHE_DIR, help="Fragment cache directory for --incremental")
+    parser.add_argument("--modules", action="store_true",
+                        help="Also write one module per top-level element branch plus a root ontology that owl:imports them "
+                             "(to OUTPUT_DIR/modules)")
+    args = parser.parse_args()
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    build_all(args.structure, {
+        "ttl": args.output_dir / "sdformat_model.ttl",
+        "owl": args.output_dir / "sdformat_model.owl",
+        "rdfb": args.output_dir / "sdformat_model.rdfb",
+    }, workers=args.workers, incremental=args.incremental, cache_dir=args.cache_dir)
+    if args.modules:
+        build_modules(args.structure, args.output_dir / MODULES_DIR_NAME)
 
 if __name__ == "__main__":
-    ONTOLOGY_OUT_DIR.mkdir(parents=True, exist_ok=True)
-    build_ontology(STRUCTURE_JSON_PATH, ONTOLOGY_OUT_DIR / "sdformat_model.ttl")
-    build_ontology_rdfxml(STRUCTURE_JSON_PATH, ONTOLOGY_OUT_DIR / "sdformat_model.owl")
+    main()
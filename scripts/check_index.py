@@ -1,4 +1,4 @@
-import requests
+import http_client
 from html.parser import HTMLParser
 
 class LinkParser(HTMLParser):
@@ -14,7 +14,7 @@ class LinkParser(HTMLParser):
 
 url = "https://sdformat.org/spec/1.12/"
 try:
-    response = requests.get(url)
+    response = http_client.get(url)
     print(f"Status: {response.status_code}")
     parser = LinkParser()
     parser.feed(response.text)
@@ -1,11 +1,12 @@
-import requests
+import http_client
 
 def check_url(url):
     try:
-        response = requests.get(url)
+        response = http_client.get(url)
         print(f"{url}: {response.status_code}")
     except Exception as e:
         print(f"{url}: Error {e}")
 
 check_url("https://sdformat.org/spec/1.12/link")
 check_url("https://sdformat.org/spec/1.12/joint")
+http_client.print_connection_stats()
@@ -1,10 +1,10 @@
 
-import requests
+import http_client
 from html.parser import HTMLParser
 
 url = "https://sdformat.org/spec/1.9/model"
 try:
-    response = requests.get(url)
+    response = http_client.get(url)
     print(f"Status: {response.status_code}")
     if response.status_code == 200:
         if 'class="tree well"' in response.text:
@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+# 默认并发参数：总并发数，以及对同一 host 的礼貌上限
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+class HostLimiter:
+    """每个 host 一个信号量，限制同时打到同一站点的请求数。"""
+
+    def __init__(self, per_host=DEFAULT_PER_HOST):
+        self.per_host = max(1, int(per_host))
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = sem
+        return sem
+
+
+def crawl(jobs, fetch, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST):
+    """并发执行抓取任务。
+
+    jobs 是 (key, url) 列表，fetch(url, key) 返回该页面的结果。
+    返回 [(key, result, error), ...]，顺序与 jobs 一致（与完成顺序无关），
+    因此调用方可以按确定的顺序写出文件。
+    """
+    jobs = list(jobs)
+    limiter = HostLimiter(per_host)
+
+    def run(job):
+        key, url = job
+        try:
+            with limiter.slot(url):
+                return key, fetch(url, key), None
+        except Exception as e:
+            return key, None, e
+
+    # 实际并发数不超过 per_host × host 数：规范页面都在同一个 host 上时即 min(workers, per_host)，
+    # 多开的线程只会在信号量上等待
+    hosts = len({urlsplit(url).netloc for _, url in jobs})
+    workers = min(max(1, int(workers)), limiter.per_host * max(1, hosts))
+    if workers == 1 or len(jobs) <= 1:
+        return [run(job) for job in jobs]
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        # map 保持输入顺序；总耗时约为各页面耗时之和除以实际并发数
+        return list(pool.map(run, jobs))
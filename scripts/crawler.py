@@ -1,15 +1,33 @@
-import requests
+import sys
 from pathlib import Path
 
+import http_client
+
 url = "https://sdformat.org/spec/1.12/model/"
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 OUT_PATH = PROJECT_ROOT / "outputs" / "raw" / "page_content.html"
-try:
-    response = requests.get(url)
-    response.raise_for_status()
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUT_PATH, "w", encoding="utf-8") as f:
-        f.write(response.text)
-    print("Successfully downloaded page content.")
-except Exception as e:
-    print(f"Error: {e}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Download a single spec page to outputs/raw/page_content.html.")
+    parser.add_argument("url", nargs="?", default=url, help="Page to download")
+    parser.add_argument("-o", "--output", type=Path, default=OUT_PATH, help="Where to write the page")
+    http_client.add_http_arguments(parser)
+    args = parser.parse_args()
+    # 与 extract_all.py / enrich_structure.py 共用同一份磁盘缓存（--cache-dir/--max-age/--no-cache/--offline）
+    http_client.configure_from_args(args)
+
+    try:
+        content = http_client.fetch_text(args.url)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(content)
+        print("Successfully downloaded page content.")
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import itertools
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+STRUCTURES_DIR = PROJECT_ROOT / "data" / "structures"
+DIFF_OUT_DIR = PROJECT_ROOT / "outputs" / "diff"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sdf_parser import node_details
+from spec_hash import subtree_hashes
+from structure_index import node_path
+
+# 参与比较的节点字段
+COMPARED_FIELDS = ("required", "type", "default", "description")
+
+
+def load_version(version, structures_dir=STRUCTURES_DIR):
+    """读取某个版本目录下的 structure_<name>.json，返回 {元素名: 结构列表}（跳过 manifest 与 _shared）。"""
+    structs = {}
+    for path in sorted((Path(structures_dir) / version).glob("structure_*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            structs[path.stem[len("structure_"):]] = json.load(f)
+    return structs
+
+
+def available_versions(structures_dir=STRUCTURES_DIR):
+    versions = [p.name for p in Path(structures_dir).iterdir() if p.is_dir() and not p.name.startswith("_")]
+    return sorted(versions, key=lambda v: tuple(int(x) for x in v.split(".") if x.isdigit()))
+
+
+def _hasher(roots):
+    """按内容计算整个文件的子树哈希，返回 node -> hash 的查找函数。
+
+    不使用文件中保存的 hash 字段：手工修改过的文件或旧版本写出的哈希可能与内容不符，
+    会让有变化的子树被当作相同而跳过。
+    """
+    hashes = subtree_hashes(roots)
+    return lambda node: hashes[id(node)]
+
+
+def _fields(node):
+    # 缺失与空字段由 node_details 统一为 ""，新旧格式的文件之间不会报出伪差异
+    return {**node_details(node), "description": node.get("description", "")}
+
+
+def _count(node):
+    count = 0
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        count += 1
+        stack.extend(current.get("children", []))
+    return count
+
+
+def _pair(old_nodes, new_nodes):
+    """按 (node_type, name) 配对兄弟节点；同名节点按出现顺序依次配对。"""
+    def key(node):
+        return node.get("node_type", "Element"), node.get("name", "")
+
+    buckets = {}
+    for node in old_nodes:
+        buckets.setdefault(key(node), []).append(node)
+    pairs = []
+    for node in new_nodes:
+        bucket = buckets.get(key(node))
+        pairs.append((bucket.pop(0) if bucket else None, node))
+    removed = [node for bucket in buckets.values() for node in bucket]
+    return pairs, removed
+
+
+def diff_trees(element, old_roots, new_roots, old_hash, new_hash, changes, added, removed):
+    """比较两棵结构树。哈希相同的子树整体跳过，所以耗时与变化量成正比。"""
+    stack = [("", old_roots, new_roots)]
+    while stack:
+        parent_path, old_nodes, new_nodes = stack.pop()
+        pairs, gone = _pair(old_nodes, new_nodes)
+        for node in gone:
+            removed.append((element, node_path(parent_path, node), node, old_hash(node)))
+        for old, new in pairs:
+            path = node_path(parent_path, new)
+            if old is None:
+                added.append((element, path, new, new_hash(new)))
+                continue
+            if old_hash(old) == new_hash(new):
+                continue
+            old_fields, new_fields = _fields(old), _fields(new)
+            diff = {name: [old_fields[name], new_fields[name]] for name in COMPARED_FIELDS
+                    if old_fields[name] != new_fields[name]}
+            if diff:
+                changes.append({"op": "change", "element": element, "path": path, "fields": diff})
+            stack.append((path, old.get("children", []), new.get("children", [])))
+
+
+def diff_versions(old_structs, new_structs):
+    """返回变化列表：add / remove / change / move。
+
+    在一处删除、另一处新增且哈希相同的子树记为 move（可以跨元素文件）。
+    """
+    changes = []
+    added = []
+    removed = []
+    for element in sorted(set(old_structs) | set(new_structs)):
+        old_roots = old_structs.get(element, [])
+        new_roots = new_structs.get(element, [])
+        diff_trees(element, old_roots, new_roots, _hasher(old_roots), _hasher(new_roots), changes, added, removed)
+
+    removed_by_hash = {}
+    for item in removed:
+        removed_by_hash.setdefault(item[3], []).append(item)
+    for element, path, node, digest in added:
+        candidates = removed_by_hash.get(digest)
+        if candidates:
+            from_element, from_path, _, _ = candidates.pop(0)
+            changes.append({"op": "move", "element": element, "path": path,
+                            "from_element": from_element, "from_path": from_path, "nodes": _count(node)})
+        else:
+            changes.append({"op": "add", "element": element, "path": path, "nodes": _count(node)})
+    for candidates in removed_by_hash.values():
+        for element, path, node, _ in candidates:
+            changes.append({"op": "remove", "element": element, "path": path, "nodes": _count(node)})
+
+    order = {"remove": 0, "add": 1, "move": 2, "change": 3}
+    changes.sort(key=lambda c: (c["element"], c["path"], order[c["op"]]))
+    return changes
+
+
+def summarize(old_version, new_version, changes):
+    counts = {op: 0 for op in ("add", "remove", "change", "move")}
+    per_element = {}
+    for change in changes:
+        counts[change["op"]] += 1
+        per_element.setdefault(change["element"], {op: 0 for op in counts})[change["op"]] += 1
+    return {"from": old_version, "to": new_version, "counts": counts, "elements": per_element}
+
+
+def print_summary(summary, elapsed):
+    counts = summary["counts"]
+    print(f"{summary['from']} -> {summary['to']}: {counts['add']} added, {counts['remove']} removed, "
+          f"{counts['change']} changed, {counts['move']} moved ({elapsed * 1000:.1f} ms)")
+    for element, element_counts in sorted(summary["elements"].items()):
+        parts = ", ".join(f"{n} {op}" for op, n in element_counts.items() if n)
+        print(f"  {element}: {parts}")
+
+
+def run_diff(old_version, new_version, output=None, structures_dir=STRUCTURES_DIR):
+    old_structs = load_version(old_version, structures_dir)
+    new_structs = load_version(new_version, structures_dir)
+    start = time.perf_counter()
+    changes = diff_versions(old_structs, new_structs)
+    elapsed = time.perf_counter() - start
+    summary = summarize(old_version, new_version, changes)
+    print_summary(summary, elapsed)
+    if output is not None:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "changes": changes}, f, indent=2, ensure_ascii=False)
+        print(f"Saved {output}")
+    return changes
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Structural diff between the extracted structures of two SDFormat versions.")
+    parser.add_argument("versions", nargs="*", help="Old and new version, e.g. 1.9 1.12")
+    parser.add_argument("--all", action="store_true", help="Diff every pair of versions under data/structures/")
+    parser.add_argument("-o", "--output", type=Path,
+                        help="JSON output file (default: outputs/diff/<old>_<new>.json; with --all, one file per pair there)")
+    parser.add_argument("--structures-dir", type=Path, default=STRUCTURES_DIR)
+    args = parser.parse_args()
+
+    if args.all:
+        pairs = list(itertools.combinations(available_versions(args.structures_dir), 2))
+    elif len(args.versions) == 2:
+        pairs = [tuple(args.versions)]
+    else:
+        parser.error("give two versions or --all")
+
+    for old_version, new_version in pairs:
+        output = args.output if args.output and not args.all else DIFF_OUT_DIR / f"{old_version}_{new_version}.json"
+        run_diff(old_version, new_version, output, args.structures_dir)
+
+if __name__ == "__main__":
+    main()
@@ -1,305 +1,234 @@
-import requests
-from html.parser import HTMLParser
 import json
-import re
 import shutil
-import copy
 import sys
 from pathlib import Path
 
-# Increase recursion limit just in case, though we should fix the logic
-sys.setrecursionlimit(2000)
+import http_client
+import sdf_parser
+from concurrent_crawl import crawl, DEFAULT_WORKERS, DEFAULT_PER_HOST
+from spec_index import get_all_element_names, version_url
+from sdf_parser import parse_structure, parse_structure_stream
+from structure_dag import NodeTable, share_tree, dump_expanded, to_compact, count_nodes
+from structure_index import write_index
+from spec_hash import HASH_FIELD, annotate
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 MERGED_DIR = PROJECT_ROOT / "data" / "merged"
 ENRICH_TARGETS_DIR = MERGED_DIR / "enrich_targets"
 
-# 复用 BetterSDFParser，但稍作修改以适应多页面抓取
-class SDFParser(HTMLParser):
-    def __init__(self):
-        super().__init__()
-        self.stack = [] 
-        self.root_list = []
-        self.stack.append(self.root_list)
-        
-        self.current_item = None
-        self.in_h5 = False
-        self.in_small = False
-        self.in_details = False
-        self.in_description = False
-        self.buffers = {"name": "", "type": "", "details": "", "description": ""}
-        self.capture_mode = False
-        self.div_level = 0
-        self.tree_well_depth = 0 # 记录 tree well 的 div 深度
+MERGED_SOURCES_PATH = MERGED_DIR / "sources.json"
+ENRICH_VERSION = "1.12"
 
-    def handle_starttag(self, tag, attrs):
-        attrs_dict = dict(attrs)
-        class_list = attrs_dict.get("class", "").split()
+# 子元素展开规则：元素名 -> 允许展开的父元素（None 表示任意父元素）与最大展开深度（None 表示不限）。
+# sub_structs 里有页面但不在表中的元素按 DEFAULT_EXPANSION_RULE 处理。
+EXPANSION_RULES = {
+    "joint": {"parents": ("model", "world", "root"), "max_depth": None},
+    "link": {"parents": ("model", "root"), "max_depth": None},
+}
+DEFAULT_EXPANSION_RULE = {"parents": None, "max_depth": None}
+# 超过该深度的节点原样保留，不再展开
+MAX_MERGE_DEPTH = 100
 
-        if tag == "div":
-            if "tree" in class_list and "well" in class_list:
-                if not self.capture_mode:
-                    self.capture_mode = True
-                    self.tree_well_depth = self.div_level
-            self.div_level += 1
-
-        if not self.capture_mode:
-            return
-
-        if tag == "ul":
-            # 进入子列表
-            # 只有当 current_item 存在时，ul 才是它的 children
-            # 但是 HTML 结构可能是 li -> ul
-            if self.current_item:
-                new_list = self.current_item["children"]
-                self.stack.append(new_list)
-            else:
-                pass
-
-        elif tag == "li":
-            # 新的项
-            self.current_item = {
-                "node_type": "Element", # 默认为 Element，稍后修正
-                "name": "",
-                "details_raw": "",
-                "description": "",
-                "children": []
-            }
-            self.stack[-1].append(self.current_item)
-            
-            # 清空 buffers
-            for k in self.buffers:
-                self.buffers[k] = ""
-
-        elif tag == "h5":
-            self.in_h5 = True
-
-        elif tag == "small":
-            self.in_small = True
-
-        elif tag == "div":
-            if "col-xs-4" in class_list:
-                self.in_details = True
-            elif "col-xs-8" in class_list:
-                self.in_description = True
-
-    def handle_endtag(self, tag):
-        if tag == "div":
-            self.div_level -= 1
-            if self.capture_mode and self.div_level == self.tree_well_depth:
-                self.capture_mode = False
-            
-            if self.in_details:
-                self.in_details = False
-                if self.current_item:
-                    self.current_item["details_raw"] = self.buffers["details"]
-            
-            if self.in_description:
-                self.in_description = False
-                if self.current_item:
-                    desc = self.buffers["description"].strip()
-                    if desc.startswith("Description:"):
-                        desc = desc[len("Description:"):].strip()
-                    self.current_item["description"] = desc
-
-        elif tag == "ul":
-            if self.capture_mode:
-                if len(self.stack) > 1:
-                    self.stack.pop()
-
-        elif tag == "li":
-            # 结束当前项，但在 tree view 中，li 包含 ul，所以 li 结束意味着其子树也结束
-            # 我们不需要在这里做特别的操作，因为 item 已经在 list 中了
-            # 只需要确定 current_item 不再指向它（防止后续误操作，虽然后续是新的 li）
-            pass
-
-        elif tag == "h5":
-            self.in_h5 = False
-            if self.current_item:
-                raw_name = self.buffers["name"].strip()
-                # 移除 < 和 >
-                raw_name = raw_name.replace("<", "").replace(">", "")
-                
-                # 区分 Attribute (@name) 和 Element (name)
-                if raw_name.startswith("@"):
-                    self.current_item["node_type"] = "Attribute"
-                    self.current_item["name"] = raw_name[1:]
-                else:
-                    self.current_item["node_type"] = "Element"
-                    self.current_item["name"] = raw_name
-
-        elif tag == "small":
-            self.in_small = False
-
-    def handle_data(self, data):
-        if not self.capture_mode:
-            return
-
-        if self.in_small:
-            self.buffers["type"] += data
-        elif self.in_h5:
-            self.buffers["name"] += data
-
-        if self.in_details:
-            self.buffers["details"] += data + " "
-
-        if self.in_description:
-            self.buffers["description"] += data
-
-
-def extract_structure_from_url(url, element_name):
+def extract_structure_from_url(url, element_name, stream=False):
     print(f"Crawling {url}...")
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        content = response.text
+        if stream:
+            return parse_structure_stream(http_client.iter_text(url), element_name)
+        content = http_client.fetch_text(url)
     except Exception as e:
         print(f"Failed to download {url}: {e}")
         return []
 
-    parser = SDFParser()
-    parser.feed(content)
-    
-    # 修正：有些页面可能直接列出属性，没有外层包裹，或者结构略有不同
-    # 但 SDF 网站通常结构一致
-    
-    # 后处理：根节点通常是我们要的元素（例如 link），但 parser 可能会抓取到它的父容器或者直接是列表
-    # parser.root_list 通常包含一个或多个顶层元素
-    
-    # 验证：根节点应该是 element_name
-    result = []
-    for item in parser.root_list:
-        if item["name"] == element_name:
-            result.append(item)
-        else:
-            # 有时页面会包含一些导航或其他 tree well，需要过滤
-            # 但根据经验，主要 tree well 包含该元素
-            if item["name"] == element_name:
-                result.append(item)
-    
-    # 如果没找到，可能 parser.root_list 就是那个列表，里面包含属性
-    # 实际上，parser 会把 <div class="tree well"><ul><li>...</li></ul></div> 解析出来
-    # 根通常是 element_name 本身
-    
-    if not result and parser.root_list:
-        # 尝试查找匹配的
-        for item in parser.root_list:
-             if item.get("name") == element_name:
-                 return [item]
-    
-    return parser.root_list
-
-def merge_structure(main_struct, sub_structs):
-    # main_struct 是一个列表，通常包含一个根 'model'
-    # sub_structs 是一个字典 { 'link': link_struct_list, 'joint': joint_struct_list }
-    
-    def recursive_merge(node, depth=0, path=""):
-        current_path = f"{path}/{node.get('name', 'unknown')}"
-        
-        if depth > 100:
-             print(f"Max depth reached at: {current_path}")
-             return
-
-        node_type = node.get("node_type", "Element") # 默认为 Element
-        
-        if node_type == "Element":
-            name = node.get("name")
-            
-            # Determine parent name for context-aware expansion
-            parent_name = path.split("/")[-1] if "/" in path else path
-
-            # Logic to decide whether to expand using sub_structs
-            should_expand = False
-            
-            if name in sub_structs:
-                if name == "joint":
-                    # Only expand joint if it is a direct child of model or world
-                    if parent_name in ["model", "world", "root"]: # root for top level testing
-                        should_expand = True
-                elif name == "link":
-                    # Only expand link if it is a direct child of model
-                    if parent_name in ["model", "root"]:
-                        should_expand = True
-                else:
-                    # For other elements (sensor, light, etc.), expand freely or add restrictions if needed
-                    # Sensor can be in link, joint, model, world
-                    should_expand = True
-            
-            if should_expand:
-                sub_roots = sub_structs[name]
-                if sub_roots:
-                    sub_root = sub_roots[0] # 取第一个匹配的根
-                    
-                    # 检查当前 node 的 children
-                    # 重要：为了避免共享引用导致的递归或状态污染，使用 deepcopy
-                    if not node.get("children"):
-                        node["children"] = copy.deepcopy(sub_root.get("children", []))
-                        # 也可以更新描述和 details
-                        if not node.get("description"):
-                            node["description"] = sub_root.get("description", "")
-            
-        for child in node.get("children", []):
-            recursive_merge(child, depth + 1, current_path)
-
-    for root in main_struct:
-        recursive_merge(root, 0, "root")
-    
-    return main_struct
+    return parse_structure(content, element_name)
+
+def merge_structure(main_struct, sub_structs, rules=None, table=None):
+    """把 sub_structs 中各元素页面的子树展开到 main_struct 里，返回共享子树的 DAG（不修改输入）。
+
+    main_struct 是根结构列表（通常只有一个 'model'），sub_structs 是 {元素名: 结构列表}。
+    一个元素在下列条件同时满足时展开：有页面、父元素符合规则、深度不超过规则的 max_depth、
+    祖先中没有同名元素（保证展开收敛）、节点自身还没有子节点。
+    结果中每个节点都带有重新计算的 hash 字段（见 spec_hash）。
+    展开结果按 (源节点, 上下文) 记忆化，同一子树在相同上下文中只展开一次；用显式栈迭代，不依赖递归深度。
+    """
+    rules = EXPANSION_RULES if rules is None else rules
+    table = table if table is not None else NodeTable()
+    rule_for = {name: rules.get(name, DEFAULT_EXPANSION_RULE) for name in sub_structs}
+    # 子元素页面的原始子树先共享化，展开时直接引用
+    sub_roots = {name: share_tree(roots, table)[0] for name, roots in sub_structs.items() if roots}
+    depth_limited = any(rule["max_depth"] is not None for rule in rule_for.values())
+    memo = {}
+
+    def context_key(node, depth, parent_name, ancestors):
+        # 只有会影响展开结果的上下文才进入键：可展开元素的祖先集合、受父元素限制时的父元素名，
+        # 以及存在深度限制时的深度
+        rule = rule_for.get(node.get("name"))
+        parent = parent_name if rule is not None and rule["parents"] is not None else None
+        return (id(node), parent, ancestors, depth if depth_limited or depth > MAX_MERGE_DEPTH else None)
+
+    def expand(node, depth, parent_name, ancestors):
+        """返回 (不含 children 的输出节点, 待处理的子节点列表)。"""
+        out = dict(node)
+        # 展开后子树变了，源节点上的哈希不再有效，合并完成后统一重算
+        out.pop(HASH_FIELD, None)
+        children = node.get("children")
+        name = node.get("name")
+        rule = rule_for.get(name)
+        if (node.get("node_type", "Element") == "Element" and rule is not None and name in sub_roots
+                and (rule["parents"] is None or parent_name in rule["parents"])
+                and (rule["max_depth"] is None or depth <= rule["max_depth"])
+                and name not in ancestors and not children):
+            sub_root = sub_roots[name]
+            children = sub_root.get("children", [])
+            out["children"] = children
+            if not out.get("description"):
+                out["description"] = sub_root.get("description", "")
+        return out, children or []
+
+    results = []
+    # 栈中的项：("enter", 节点, 深度, 父元素名, 祖先集合) 或 ("exit", 输出节点, 子节点数, 记忆化键)
+    stack = [("enter", root, 0, "root", frozenset(["root"])) for root in reversed(main_struct)]
+    while stack:
+        item = stack.pop()
+        if item[0] == "exit":
+            _, out, count, key = item
+            if count:
+                out["children"] = results[-count:]
+                del results[-count:]
+            memo[key] = table.intern(out)
+            results.append(memo[key])
+            continue
+
+        _, node, depth, parent_name, ancestors = item
+        key = context_key(node, depth, parent_name, ancestors)
+        if key in memo:
+            results.append(memo[key])
+            continue
+        if depth > MAX_MERGE_DEPTH:
+            print(f"Max depth reached at: {node.get('name', 'unknown')}")
+            memo[key] = share_tree([node], table)[0]
+            results.append(memo[key])
+            continue
+
+        out, children = expand(node, depth, parent_name, ancestors)
+        name = node.get("name", "unknown")
+        child_ancestors = ancestors | {name} if name in sub_roots else ancestors
+        stack.append(("exit", out, len(children), key))
+        for child in reversed(children):
+            stack.append(("enter", child, depth + 1, name, child_ancestors))
+    return annotate(results)
+
+def element_names(nodes):
+    """结构树中出现的所有 Element 名称。"""
+    names = set()
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if node.get("node_type", "Element") == "Element" and node.get("name"):
+            names.add(node["name"])
+        stack.extend(node.get("children", []))
+    return names
+
+def discover_structures(base_url, root, index, workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, stream=False):
+    """从 root 页面开始按层 BFS：解析出的树中凡是在规范索引里有独立页面的元素，都加入下一层。
+
+    每个 URL 只抓取一次；某一层没有新页面时（不动点）停止。
+    返回 ({元素名: 结构}, [抓取失败或解析为空的元素名])。
+    """
+    sub_structs = {}
+    failed = []
+    seen = {root}
+    frontier = [root]
+    level = 0
+    while frontier:
+        print(f"Frontier level {level}: {frontier}")
+        jobs = [(name, base_url + name) for name in frontier]
+        results = crawl(jobs, lambda url, name: extract_structure_from_url(url, name, stream=stream),
+                        workers=workers, per_host=per_host)
+        discovered = set()
+        for name, struct, error in results:
+            if error is not None or not struct:
+                print(f"Warning: No structure found for {name}")
+                failed.append(name)
+                continue
+            sub_structs[name] = struct
+            for child in element_names(struct):
+                if child in index and child not in seen:
+                    discovered.add(child)
+        seen |= discovered
+        frontier = sorted(discovered)
+        level += 1
+    return sub_structs, failed
 
 def main():
-    # 1. 读取现有的 structure.json
-    try:
-        with open(MERGED_DIR / "structure.json", "r", encoding="utf-8") as f:
-            main_struct = json.load(f)
-    except FileNotFoundError:
-        print("structure.json not found. Run extract_structure.py first.")
-        return
+    import argparse
+    arg_parser = argparse.ArgumentParser(description="Build data/merged/structure.json by crawling a root element and every sub-element page it reaches.")
+    arg_parser.add_argument("--version", default=ENRICH_VERSION, help="SDFormat version (e.g., 1.9, 1.12)")
+    arg_parser.add_argument("--root", default="model", help="Root element of the merged structure")
+    arg_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of pages crawled concurrently")
+    arg_parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Maximum concurrent requests to the same host")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="Parse pages while they download and stop reading once the tree well closes")
+    arg_parser.add_argument("--compact", action="store_true",
+                            help="Also write data/merged/structure_compact.json, where repeated subtrees are stored once and referenced with $ref")
+    sdf_parser.add_parser_arguments(arg_parser)
+    http_client.add_http_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    sdf_parser.configure_from_args(args)
+    http_client.configure_from_args(args, pool_size=max(args.workers, http_client.DEFAULT_POOL_SIZE))
+
+    base_url = version_url(args.version)
+
+    # 1. 规范索引：哪些元素有自己的页面
+    print(f"Fetching element list from {base_url}...")
+    index = set(get_all_element_names(base_url))
+    if not index:
+        # 索引为空时只会抓到根页面，得到未展开的树，不能用它覆盖现有文件
+        print("Element index is empty; aborting without touching data/merged.")
+        return 1
+    index.add(args.root)
+
+    # 2. 从根页面出发逐层发现并抓取子元素页面
+    sub_structs, failed = discover_structures(base_url, args.root, index, args.workers, args.per_host, args.stream)
+    if failed:
+        # 任何页面缺失都会让合并结果少一部分子树，宁可保留上次的结果
+        print(f"Failed to fetch {len(failed)} page(s): {', '.join(sorted(failed))}; aborting without touching data/merged.")
+        return 1
 
-    # 2. 爬取 link 和 joint
-    # 还有其他未展开的吗？actor? light? sensor?
-    # 用户提到了 link 和 joint。我们也检查一下 sensor, light, actor, collision, visual (在 link 下)
-    # 但是 visual/collision 通常在 link 页面里已经展开了。
-    # 让我们先关注 link 和 joint。
-    
-    targets = {
-        "link": "https://sdformat.org/spec/1.12/link",
-        "joint": "https://sdformat.org/spec/1.12/joint",
-        "sensor": "https://sdformat.org/spec/1.12/sensor",
-        "light": "https://sdformat.org/spec/1.12/light",
-        "actor": "https://sdformat.org/spec/1.12/actor",
-        "collision": "https://sdformat.org/spec/1.12/collision",
-        "visual": "https://sdformat.org/spec/1.12/visual",
-        "inertial": "https://sdformat.org/spec/1.12/inertial"
-    }
-    
-    sub_structs = {}
     ENRICH_TARGETS_DIR.mkdir(parents=True, exist_ok=True)
-    
-    for name, url in targets.items():
-        print(f"Extracting {name}...")
-        struct = extract_structure_from_url(url, name)
-        if struct:
-            sub_structs[name] = struct
-            # 同时保存一份单独的文件以备查
-            with open(ENRICH_TARGETS_DIR / f"structure_{name}.json", "w", encoding="utf-8") as f:
-                json.dump(struct, f, indent=2, ensure_ascii=False)
-        else:
-            print(f"Warning: No structure found for {name}")
+    for name, struct in sorted(sub_structs.items()):
+        # 同时保存一份单独的文件以备查
+        with open(ENRICH_TARGETS_DIR / f"structure_{name}.json", "w", encoding="utf-8") as f:
+            json.dump(annotate(struct), f, indent=2, ensure_ascii=False)
 
-    # 3. 合并
+    # 3. 合并：相同子树共享，不修改 sub_structs
     print("Merging structures...")
-    merged_struct = merge_structure(main_struct, sub_structs)
+    merged_struct = merge_structure(sub_structs[args.root], sub_structs)
+    total, distinct = count_nodes(merged_struct)
+    print(f"Merged tree: {total} nodes, {distinct} distinct subtrees in memory")
     
-    # 4. 保存
+    # 4. 保存（完全展开的形式）
     with open(MERGED_DIR / "structure_merged.json", "w", encoding="utf-8") as f:
-        json.dump(merged_struct, f, indent=2, ensure_ascii=False)
+        f.write(dump_expanded(merged_struct))
+    if args.compact:
+        with open(MERGED_DIR / "structure_compact.json", "w", encoding="utf-8") as f:
+            json.dump(to_compact(merged_struct), f, indent=2, ensure_ascii=False)
     
     # 覆盖原文件？或者保留 merged
     # 为了后续脚本兼容，最好覆盖 structure.json，但先备份
-    shutil.copy(MERGED_DIR / "structure.json", MERGED_DIR / "structure_backup.json")
+    if (MERGED_DIR / "structure.json").exists():
+        shutil.copy(MERGED_DIR / "structure.json", MERGED_DIR / "structure_backup.json")
     shutil.copy(MERGED_DIR / "structure_merged.json", MERGED_DIR / "structure.json")
+    # 路径索引与 structure.json 放在一起，供查询工具直接读取
+    path_index = write_index()
+    print(f"Indexed {len(path_index['paths'])} paths")
+
+    # 记录 structure.json 依赖的页面，供 incremental.py 判断失效
+    with open(MERGED_SOURCES_PATH, "w", encoding="utf-8") as f:
+        json.dump({"version": args.version, "root": args.root, "pages": sorted(sub_structs)}, f, indent=2)
     
+    http_client.print_connection_stats()
     print("Done. structure.json updated.")
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
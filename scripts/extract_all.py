@@ -1,84 +1,222 @@
-import json
-import requests
-from html.parser import HTMLParser
-import sys
 import os
+import shutil
+import sys
+import threading
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+STRUCTURES_DIR = PROJECT_ROOT / "data" / "structures"
+SHARED_DIR = STRUCTURES_DIR / "_shared"
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from enrich_structure import extract_structure_from_url
+import http_client
+import sdf_parser
+import incremental
+import batch_parse
+from spec_hash import annotate
+from sdf_parser import parse_structure, parse_structure_stream
+from concurrent_crawl import crawl, DEFAULT_WORKERS, DEFAULT_PER_HOST
+from spec_index import get_all_element_names, expand_versions, version_url
+
+
+class ParseOnce:
+    """相同的 (页面内容哈希, 元素名) 只解析一次，结果在版本之间共享。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._slots = {}
+        self.parsed = 0
+        self.reused = 0
+
+    def get(self, key, compute):
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = {"lock": threading.Lock(), "done": False, "value": None}
+                self._slots[key] = slot
+        with slot["lock"]:
+            if slot["done"]:
+                with self._lock:
+                    self.reused += 1
+                return slot["value"]
+            slot["value"] = compute()
+            slot["done"] = True
+            with self._lock:
+                self.parsed += 1
+            return slot["value"]
+
 
-def get_all_element_names(base_url):
+def _write_text(path, text):
+    # 先写临时文件再替换：文件可能是 _shared 对象的硬链接，不能原地截断
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_structure(filename, text, digest, shared=False):
+    """写出 structure_<name>.json。shared=True 时内容只在 _shared/ 中存一份，各版本文件是它的硬链接。"""
+    if not shared:
+        _write_text(filename, text)
+        return
+    obj = SHARED_DIR / f"{digest}.json"
+    if not obj.exists():
+        SHARED_DIR.mkdir(parents=True, exist_ok=True)
+        _write_text(obj, text)
+    if filename.exists():
+        if os.path.samefile(filename, obj):
+            return
+        filename.unlink()
     try:
-        response = requests.get(base_url)
-        if response.status_code != 200:
-            print(f"Failed to fetch index: {response.status_code}")
-            return []
-        
-        links = set()
-        class LinkParser(HTMLParser):
-            def handle_starttag(self, tag, attrs):
-                if tag == "a":
-                    href = dict(attrs).get("href")
-                    # Filter for simple element names 
-                    # They should be just words like "world", "model"
-                    # Exclude "index.html", "style.css", relative paths, etc.
-                    if href and not href.startswith(".") and not href.startswith("http") and "#" not in href and "/" not in href:
-                         if not href.endswith(".html") and not href.endswith(".css") and not href.endswith(".js"):
-                            links.add(href)
-        
-        parser = LinkParser()
-        parser.feed(response.text)
-        return list(links)
-    except Exception as e:
-        print(f"Error fetching index: {e}")
-        return []
+        os.link(obj, filename)
+    except OSError:
+        # 不支持硬链接的文件系统：退化为普通拷贝
+        shutil.copyfile(obj, filename)
+
 
 def main():
     import argparse
-    parser = argparse.ArgumentParser(description="Extract SDFormat structures for a specific version.")
-    parser.add_argument("version", nargs="?", default="1.12", help="SDFormat version (e.g., 1.9, 1.12)")
+    parser = argparse.ArgumentParser(description="Extract SDFormat structures for one or more spec versions.")
+    parser.add_argument("versions", nargs="*", default=["1.12"],
+                        help="SDFormat versions: 1.9 1.12, 1.9,1.12, a range such as 1.9-1.12, or all")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of pages crawled concurrently (1 = sequential)")
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="Maximum concurrent requests to the same host")
+    parser.add_argument("--full", action="store_true", help="Re-parse every page even if its content hash is unchanged")
+    parser.add_argument("--shared-store", action="store_true",
+                        help="Store each distinct structure once in data/structures/_shared and hard-link it into every version")
+    parser.add_argument("--parse-workers", type=int, default=1,
+                        help="Parse pages in a pool of N processes (useful with --offline; 0 = one per CPU)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse pages while they download and stop reading once the tree well closes")
+    sdf_parser.add_parser_arguments(parser)
+    http_client.add_http_arguments(parser)
     args = parser.parse_args()
-    
-    version = args.version
-    base_url = f"https://sdformat.org/spec/{version}/"
-    output_dir = PROJECT_ROOT / "data" / "structures" / version
-    
-    if not output_dir.exists():
-        output_dir.mkdir(parents=True, exist_ok=True)
-        print(f"Created directory: {output_dir}")
-        
-    print(f"Fetching element list from {base_url}...")
-    elements = get_all_element_names(base_url)
-    
-    # Manually add likely missing ones if any, or known ones that might be missed
-    # But checking the output of check_index.py, it seems to cover most.
-    # We saw: sdf, world, scene, state, physics, light, actor, model, link, sensor, joint, collision, visual, material, geometry
-    
-    # Sort for consistent order
-    elements.sort()
-    
-    print(f"Found {len(elements)} elements: {elements}")
-    
-    for name in elements:
-        # Skip if name is empty or weird
-        if not name: continue
-        
-        url = base_url + name
-        print(f"Extracting {name}...")
-        try:
-            struct = extract_structure_from_url(url, name)
-            if struct:
-                filename = output_dir / f"structure_{name}.json"
-                with open(filename, "w", encoding="utf-8") as f:
-                    json.dump(struct, f, indent=2, ensure_ascii=False)
-                print(f"Saved {filename}")
-            else:
-                print(f"No structure found for {name}")
-        except Exception as e:
-            print(f"Failed to process {name}: {e}")
+    sdf_parser.configure_from_args(args)
+    # 连接池至少要容纳所有并发 worker，否则多出的连接用完即丢，无法复用
+    http_client.configure_from_args(args, pool_size=max(args.workers, http_client.DEFAULT_POOL_SIZE))
+
+    try:
+        versions = expand_versions(args.versions)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # 1. 一次性并发获取所有版本的元素列表
+    for version in versions:
+        print(f"Fetching element list from {version_url(version)}...")
+    index_jobs = [(version, version_url(version)) for version in versions]
+    indexes = crawl(index_jobs, lambda url, version: get_all_element_names(url),
+                    workers=args.workers, per_host=args.per_host)
+
+    elements_by_version = {}
+    manifests = {}
+    for version, elements, error in indexes:
+        if error is not None or not elements:
+            print(f"No elements found for {version}: {error or 'empty index'}")
+            continue
+        # Skip if name is empty or weird; sort for consistent order
+        elements_by_version[version] = sorted(name for name in elements if name)
+        print(f"Found {len(elements_by_version[version])} elements in {version}: {elements_by_version[version]}")
+
+        output_dir = STRUCTURES_DIR / version
+        if not output_dir.exists():
+            output_dir.mkdir(parents=True, exist_ok=True)
+            print(f"Created directory: {output_dir}")
+        manifests[version] = incremental.load_manifest(output_dir)
+
+    # 2. 所有版本的页面放进同一个抓取池；内容相同的页面只解析一次
+    parse_once = ParseOnce()
+
+    use_process_pool = args.parse_workers != 1 and not args.stream
+
+    def serialize(struct):
+        # 每个节点带上子树哈希，供后续阶段与跨版本比较使用
+        return incremental.serialize_structure(annotate(struct)) if struct else ""
+
+    # 返回 (页面哈希, 文件文本)；文本为 None 表示未变化，"" 表示页面里没有结构
+    def fetch_and_parse(url, key):
+        version, name = key
+        print(f"Crawling {url}...")
+        if args.stream:
+            # 流式解析在 tree well 结束后就停止读取，读到哪里取决于分块方式，得不到稳定的页面哈希；
+            # 清单中记为 None，下次非流式运行时这些页面会重新解析一次
+            struct = parse_structure_stream(http_client.iter_text(url), name)
+            return None, serialize(struct)
+        content = http_client.fetch_text(url)
+        digest = incremental.page_hash(content)
+        # 页面内容没变：跳过解析与写文件
+        filename = STRUCTURES_DIR / version / f"structure_{name}.json"
+        if not args.full and incremental.is_unchanged(manifests[version], name, digest, filename):
+            return digest, None
+        if use_process_pool:
+            # 先只记录页面来源，下载全部结束后再交给进程池解析
+            return digest, batch_parse.page_source(url, content, http_client.cached_source(url))
+        return digest, parse_once.get((digest, name), lambda: serialize(parse_structure(content, name)))
+
+    jobs = [((version, name), version_url(version) + name)
+            for version, elements in elements_by_version.items() for name in elements]
+    results = crawl(jobs, fetch_and_parse, workers=args.workers, per_host=args.per_host)
+
+    if use_process_pool:
+        # 相同 (页面哈希, 元素名) 只解析一次
+        pending = {}
+        for (version, name), result, error in results:
+            if error is None and result[1] is not None:
+                pending.setdefault((result[0], name), result[1])
+        settings = sdf_parser.parser_settings()
+        parsed = batch_parse.parse_pages([(key, source, key[1]) for key, source in pending.items()],
+                                         workers=args.parse_workers or None, **settings)
+        parsed = {key: (text, parse_error) for key, text, parse_error in parsed}
+
+        def merge_parsed(key, result, error):
+            if error is not None or result[1] is None:
+                return key, result, error
+            text, parse_error = parsed[(result[0], key[1])]
+            # 解析失败的页面与抓取失败一样记为错误，其余页面照常写出并保存清单
+            return key, None if parse_error is not None else (result[0], text), parse_error
+
+        results = [merge_parsed(*item) for item in results]
+        print(f"Parsed {len(pending)} distinct pages in a pool of {args.parse_workers or os.cpu_count()} processes")
+
+    # 3. 按版本、元素的排序顺序写出，保证输出确定
+    changed = {version: [] for version in elements_by_version}
+    unchanged = {version: 0 for version in elements_by_version}
+    for (version, name), result, error in results:
+        if error is not None:
+            print(f"Failed to process {name} ({version}): {error}")
+            continue
+        manifest = manifests[version]
+        url = version_url(version) + name
+        digest, text = result
+        if text is None:
+            unchanged[version] += 1
+            continue
+        if not text:
+            print(f"No structure found for {name} ({version})")
+            manifest[name] = {"url": url, "page_sha256": digest, "structure_sha256": None}
+            continue
+
+        filename = STRUCTURES_DIR / version / f"structure_{name}.json"
+        struct_digest = incremental.structure_hash(text)
+        previous = manifest.get(name, {}).get("structure_sha256")
+        manifest[name] = {"url": url, "page_sha256": digest, "structure_sha256": struct_digest}
+        # 页面变了但解析结果相同（例如只改了导航栏）时也不重写
+        if filename.exists() and (previous == struct_digest or filename.read_text(encoding="utf-8") == text):
+            unchanged[version] += 1
+            if args.shared_store:
+                write_structure(filename, text, struct_digest, shared=True)
+            continue
+        write_structure(filename, text, struct_digest, shared=args.shared_store)
+        changed[version].append(name)
+        print(f"Saved {filename}")
+
+    for version in elements_by_version:
+        incremental.save_manifest(STRUCTURES_DIR / version, manifests[version])
+        print(f"[{version}]")
+        incremental.report(version, changed[version], unchanged[version])
+
+    if not args.stream and not use_process_pool:
+        print(f"Parsed {parse_once.parsed} distinct pages, reused {parse_once.reused} identical pages across versions")
+    http_client.print_connection_stats()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "http"
+DEFAULT_MAX_AGE = 24 * 3600  # 秒；超过后需要用 ETag/Last-Modified 重新验证
+
+
+class OfflineCacheMiss(Exception):
+    """离线模式下请求了缓存中没有的 URL。"""
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class ResponseCache:
+    """按 URL 索引、按内容寻址的磁盘响应缓存。
+
+    布局：
+      index/<aa>/<sha256(url)>.json   元数据（url, sha256, etag, last_modified, encoding, fetched_at）
+      objects/<aa>/<sha256(body)>      响应体，相同内容只存一份
+    """
+
+    def __init__(self, root=CACHE_DIR, max_age=DEFAULT_MAX_AGE):
+        self.root = Path(root)
+        self.max_age = max_age
+
+    def _entry_path(self, url):
+        key = _sha256(url.encode("utf-8"))
+        return self.root / "index" / key[:2] / f"{key}.json"
+
+    def _object_path(self, digest):
+        return self.root / "objects" / digest[:2] / digest
+
+    def lookup(self, url):
+        path = self._entry_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not self._object_path(entry.get("sha256", "")).exists():
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        if self.max_age is None:
+            return True
+        return time.time() - entry.get("fetched_at", 0) < self.max_age
+
+    def validators(self, entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def object_path(self, entry):
+        return self._object_path(entry["sha256"])
+
+    def read_body(self, entry):
+        with open(self.object_path(entry), "rb") as f:
+            return f.read()
+
+    def read_text(self, entry):
+        return self.read_body(entry).decode(entry.get("encoding") or "utf-8", errors="replace")
+
+    def _write_entry(self, entry):
+        data = json.dumps(entry, indent=2, ensure_ascii=False).encode("utf-8")
+        _atomic_write(self._entry_path(entry["url"]), data)
+
+    def store(self, url, response):
+        body = response.content
+        digest = _sha256(body)
+        obj = self._object_path(digest)
+        if not obj.exists():
+            _atomic_write(obj, body)
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "encoding": response.encoding or response.apparent_encoding,
+            "fetched_at": time.time(),
+        }
+        self._write_entry(entry)
+        return entry
+
+    def refresh(self, entry, response):
+        """304 Not Modified：沿用旧的内容，只更新时间戳和验证器。"""
+        entry = dict(entry)
+        entry["fetched_at"] = time.time()
+        if response.headers.get("ETag"):
+            entry["etag"] = response.headers["ETag"]
+        if response.headers.get("Last-Modified"):
+            entry["last_modified"] = response.headers["Last-Modified"]
+        self._write_entry(entry)
+        return entry
@@ -0,0 +1,221 @@
+import codecs
+import threading
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from http_cache import ResponseCache, OfflineCacheMiss, CACHE_DIR, DEFAULT_MAX_AGE
+
+# 所有脚本共用的抓取层：一个带连接池的 requests.Session（keep-alive），
+# 统一的超时设置，以及连接复用统计。
+
+DEFAULT_TIMEOUT = (10, 30)  # (connect, read) 秒
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CHUNK_SIZE = 16 * 1024
+# urllib3 只有在安装了 brotli/brotlicffi 时才会在这里带上 br
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+USER_AGENT = "sdformat-crawler/1.0"
+
+_config = {"timeout": DEFAULT_TIMEOUT, "pool_size": DEFAULT_POOL_SIZE}
+_lock = threading.Lock()
+_session = None
+_adapter = None
+_request_count = 0
+_cache = None
+_offline = False
+_cache_counts = {"hits": 0, "revalidated": 0, "stored": 0}
+
+
+def configure(timeout=None, pool_size=None):
+    """修改全局抓取参数。已有的 session 会被关闭，下一次请求时按新参数重建。"""
+    global _session, _adapter
+    with _lock:
+        if timeout is not None:
+            _config["timeout"] = timeout
+        if pool_size is not None:
+            _config["pool_size"] = max(1, int(pool_size))
+        if _session is not None:
+            _session.close()
+            _session = None
+            _adapter = None
+
+
+def get_session():
+    global _session, _adapter
+    with _lock:
+        if _session is None:
+            size = _config["pool_size"]
+            adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept-Encoding": ACCEPT_ENCODING,
+                "Connection": "keep-alive",
+                "User-Agent": USER_AGENT,
+            })
+            _session = session
+            _adapter = adapter
+        return _session
+
+
+def get(url, **kwargs):
+    """requests.get 的替代：复用连接池，并带上默认超时。"""
+    global _request_count
+    kwargs.setdefault("timeout", _config["timeout"])
+    session = get_session()
+    with _lock:
+        _request_count += 1
+    return session.get(url, **kwargs)
+
+
+def configure_cache(cache_dir=CACHE_DIR, max_age=DEFAULT_MAX_AGE, offline=False, enabled=True):
+    """开启/关闭磁盘缓存。offline=True 时完全不访问网络，只从缓存读取。"""
+    global _cache, _offline
+    with _lock:
+        _cache = ResponseCache(cache_dir, max_age) if (enabled or offline) else None
+        _offline = offline
+
+
+def _count(key):
+    with _lock:
+        _cache_counts[key] += 1
+
+
+def fetch_text(url):
+    """下载页面并返回文本；开启缓存时优先读缓存，过期条目用 ETag/Last-Modified 条件请求重新验证。"""
+    cache = _cache
+    if cache is None:
+        response = get(url)
+        response.raise_for_status()
+        return response.text
+
+    entry = cache.lookup(url)
+    if _offline:
+        if entry is None:
+            raise OfflineCacheMiss(f"{url} is not in the cache ({cache.root})")
+        _count("hits")
+        return cache.read_text(entry)
+
+    if entry is not None and cache.is_fresh(entry):
+        _count("hits")
+        return cache.read_text(entry)
+
+    response = get(url, headers=cache.validators(entry))
+    if response.status_code == 304 and entry is not None:
+        entry = cache.refresh(entry, response)
+        _count("revalidated")
+        return cache.read_text(entry)
+    response.raise_for_status()
+    if response.status_code != 200:
+        # raise_for_status 不把 3xx 当作错误；没有对应条目的 304（或 204 等）没有可用的页面内容，不能存入缓存
+        raise requests.HTTPError(f"Unexpected {response.status_code} response for {url}", response=response)
+    entry = cache.store(url, response)
+    _count("stored")
+    return cache.read_text(entry)
+
+
+def cached_source(url):
+    """缓存中该 URL 的 (响应体文件路径, 编码)；没有开启缓存或没有条目时返回 None。"""
+    cache = _cache
+    if cache is None:
+        return None
+    entry = cache.lookup(url)
+    if entry is None:
+        return None
+    return str(cache.object_path(entry)), entry.get("encoding") or "utf-8"
+
+
+def iter_text(url, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐块产出解码后的页面文本，供流式解析使用；调用方提前关闭生成器即停止读取响应体。
+
+    缓存中有可用条目（新鲜或离线模式）时直接从缓存分块产出；否则从网络流式读取。
+    流式读取可能提前中止，得到的不是完整页面，因此不会写入缓存。
+    """
+    cache = _cache
+    if cache is not None:
+        entry = cache.lookup(url)
+        if _offline and entry is None:
+            raise OfflineCacheMiss(f"{url} is not in the cache ({cache.root})")
+        if entry is not None and (_offline or cache.is_fresh(entry)):
+            _count("hits")
+            text = cache.read_text(entry)
+            for i in range(0, len(text), chunk_size):
+                yield text[i:i + chunk_size]
+            return
+
+    response = get(url, stream=True)
+    try:
+        response.raise_for_status()
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        text = decoder.decode(b"", final=True)
+        if text:
+            yield text
+    finally:
+        response.close()
+
+
+def connection_stats():
+    """返回请求数、新建连接数和复用次数（来自 urllib3 连接池的计数器）。"""
+    with _lock:
+        requests_sent = _request_count
+        adapter = _adapter
+        cache_counts = dict(_cache_counts)
+    connections = 0
+    pool_requests = 0
+    if adapter is not None:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            connections += pool.num_connections
+            pool_requests += pool.num_requests
+    return {
+        "requests": requests_sent,
+        "connections_opened": connections,
+        "connections_reused": max(0, pool_requests - connections),
+        "cache_hits": cache_counts["hits"],
+        "cache_revalidated": cache_counts["revalidated"],
+        "cache_stored": cache_counts["stored"],
+    }
+
+
+def print_connection_stats():
+    stats = connection_stats()
+    print(
+        f"HTTP: {stats['requests']} requests, "
+        f"{stats['connections_opened']} connections opened, "
+        f"{stats['connections_reused']} reused"
+    )
+    if _cache is not None:
+        print(
+            f"Cache: {stats['cache_hits']} hits, "
+            f"{stats['cache_revalidated']} revalidated (304), "
+            f"{stats['cache_stored']} stored"
+        )
+
+
+def add_http_arguments(parser):
+    parser.add_argument("--timeout", type=float, default=None, help="HTTP read timeout in seconds")
+    parser.add_argument("--connect-timeout", type=float, default=None, help="HTTP connect timeout in seconds")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help="On-disk response cache directory")
+    parser.add_argument("--max-age", type=float, default=DEFAULT_MAX_AGE, help="Seconds before a cached page is revalidated")
+    parser.add_argument("--no-cache", action="store_true", help="Always download pages, bypassing the on-disk cache")
+    parser.add_argument("--offline", action="store_true", help="Serve every page from the cache and never touch the network")
+
+
+def configure_from_args(args, pool_size=None):
+    connect, read = _config["timeout"]
+    if args.connect_timeout is not None:
+        connect = args.connect_timeout
+    if args.timeout is not None:
+        read = args.timeout
+    configure(timeout=(connect, read), pool_size=pool_size)
+    configure_cache(args.cache_dir, args.max_age, offline=args.offline, enabled=not args.no_cache)
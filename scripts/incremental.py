@@ -0,0 +1,89 @@
+import hashlib
+import json
+from pathlib import Path
+
+from enrich_structure import MERGED_DIR, ENRICH_TARGETS_DIR, MERGED_SOURCES_PATH, ENRICH_VERSION
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ONTOLOGY_OUT_DIR = PROJECT_ROOT / "outputs" / "ontology"
+MANIFEST_NAME = "manifest.json"
+
+ONTOLOGY_OUTPUTS = [ONTOLOGY_OUT_DIR / "sdformat_model.ttl", ONTOLOGY_OUT_DIR / "sdformat_model.owl"]
+
+
+def serialize_structure(struct):
+    """structure_<name>.json 的文件内容（与 json.dump(indent=2, ensure_ascii=False) 一致）。"""
+    return json.dumps(struct, indent=2, ensure_ascii=False)
+
+
+def page_hash(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def structure_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def load_manifest(output_dir):
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    with open(Path(output_dir) / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, indent=2, ensure_ascii=False)
+
+
+def is_unchanged(manifest, name, digest, structure_path):
+    """页面哈希与上次一致且输出文件仍在，则无需重新解析。"""
+    entry = manifest.get(name)
+    if not entry or entry.get("page_sha256") != digest:
+        return False
+    return entry.get("structure_sha256") is not None and Path(structure_path).exists()
+
+
+def merged_sources():
+    """structure.json 由哪个版本的哪些页面合并而来（enrich_structure.py 写出的 sources.json）。
+
+    还没有 sources.json 时返回 (ENRICH_VERSION, None)，表示该版本任一页面变化都视为失效。
+    """
+    try:
+        with open(MERGED_SOURCES_PATH, "r", encoding="utf-8") as f:
+            sources = json.load(f)
+        return sources.get("version", ENRICH_VERSION), set(sources.get("pages", []))
+    except (FileNotFoundError, ValueError):
+        return ENRICH_VERSION, None
+
+
+def invalidated_artifacts(version, changed_names):
+    """根据发生变化的元素，列出需要重新生成的下游产物。"""
+    changed = set(changed_names)
+    artifacts = []
+    merged_version, pages = merged_sources()
+    if version != merged_version:
+        return artifacts
+    if pages is not None:
+        changed &= pages
+    for name in sorted(changed):
+        artifacts.append(ENRICH_TARGETS_DIR / f"structure_{name}.json")
+    if changed:
+        artifacts.append(MERGED_DIR / "structure.json")
+        artifacts.append(MERGED_DIR / "structure_index.json")
+        artifacts.extend(ONTOLOGY_OUTPUTS)
+    return artifacts
+
+
+def report(version, changed_names, unchanged_count):
+    print(f"{len(changed_names)} changed, {unchanged_count} unchanged")
+    for name in changed_names:
+        print(f"  changed: {name}")
+    artifacts = invalidated_artifacts(version, changed_names)
+    if artifacts:
+        print("Invalidated downstream artifacts:")
+        for path in artifacts:
+            print(f"  {path.relative_to(PROJECT_ROOT)}")
+    else:
+        print("No downstream artifacts invalidated.")
@@ -0,0 +1,205 @@
+import mmap
+import struct
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+ONTOLOGY_OUT_DIR = PROJECT_ROOT / "outputs" / "ontology"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ontology_graph import Literal, Restriction, TripleStore
+
+# 文件布局（小端）：
+#   头部       MAGIC, 版本, 字符串数, 项数, 三元组数
+#   字符串表   (字符串数 + 1) 个 u32 偏移，随后是 UTF-8 数据
+#   项表       每项 3 个 u32：类型, a, b。IRI / 字面量：a 为字符串编号；限制：a、b 为属性与值域类的项编号
+#   三元组     每个三元组 3 个 u32 项编号，按主语分组（同 TripleStore.subjects() 的顺序）
+MAGIC = b"SDFR"
+FORMAT_VERSION = 1
+TERM_IRI, TERM_LITERAL, TERM_RESTRICTION = 0, 1, 2
+UNUSED = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<4s4I")
+_TERM = struct.Struct("<3I")
+_TRIPLE = struct.Struct("<3I")
+_U32 = struct.Struct("<I")
+
+
+def encode(store):
+    """TripleStore -> 二进制内容。项与字符串按首次出现的顺序编号，同一个 store 总是得到相同的字节。"""
+    strings = {}
+    term_ids = {}
+    terms = []
+
+    def term_id(term):
+        key = (type(term), term)
+        index = term_ids.get(key)
+        if index is not None:
+            return index
+        if isinstance(term, Restriction):
+            record = (TERM_RESTRICTION, term_id(term.on_property), term_id(term.some_values_from))
+        else:
+            kind = TERM_LITERAL if isinstance(term, Literal) else TERM_IRI
+            record = (kind, strings.setdefault(str(term), len(strings)), UNUSED)
+        index = term_ids[key] = len(terms)
+        terms.append(record)
+        return index
+
+    triples = []
+    for subject, statements in store.subjects():
+        s = term_id(subject)
+        for p, o in statements:
+            triples.append((s, term_id(p), term_id(o)))
+
+    blobs = [s.encode("utf-8") for s in strings]
+    buf = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(blobs), len(terms), len(triples)))
+    offset = 0
+    for blob in blobs:
+        buf += _U32.pack(offset)
+        offset += len(blob)
+    buf += _U32.pack(offset)
+    for blob in blobs:
+        buf += blob
+    buf.extend(b"\0" * (-len(buf) % 4))
+    for record in terms:
+        buf += _TERM.pack(*record)
+    for triple in triples:
+        buf += _TRIPLE.pack(*triple)
+    return bytes(buf)
+
+
+def write_binary(store, output_file):
+    with open(output_file, "wb") as f:
+        f.write(encode(store))
+    print(f"Ontology saved to {output_file}")
+
+
+class OntologyFile:
+    """通过 mmap 读取二进制本体；项在第一次被访问时才解码。"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_strings, n_terms, n_triples = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a binary ontology file (version {FORMAT_VERSION})")
+        self._str_offsets = _HEADER.size
+        self._str_data = self._str_offsets + (n_strings + 1) * 4
+        data_end = self._str_data + _U32.unpack_from(self._map, self._str_offsets + n_strings * 4)[0]
+        self._terms = data_end + (-data_end % 4)
+        self._triples = self._terms + n_terms * _TERM.size
+        self.string_count = n_strings
+        self.term_count = n_terms
+        self.triple_count = n_triples
+        self._decoded = [None] * n_terms
+
+    def close(self):
+        self._decoded = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.triple_count
+
+    def _string(self, index):
+        start, end = struct.unpack_from("<2I", self._map, self._str_offsets + index * 4)
+        return self._map[self._str_data + start:self._str_data + end].decode("utf-8")
+
+    def term(self, index):
+        term = self._decoded[index]
+        if term is None:
+            kind, a, b = _TERM.unpack_from(self._map, self._terms + index * _TERM.size)
+            if kind == TERM_RESTRICTION:
+                term = Restriction((self.term(a), self.term(b)))
+            elif kind == TERM_LITERAL:
+                term = Literal(self._string(a))
+            else:
+                term = self._string(a)
+            self._decoded[index] = term
+        return term
+
+    def terms(self):
+        """一次解码全部项，返回与项编号对应的列表。"""
+        n_strings = self.string_count
+        offsets = struct.unpack_from(f"<{n_strings + 1}I", self._map, self._str_offsets)
+        data = self._map[self._str_data:self._str_data + offsets[-1]]
+        strings = [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(n_strings)]
+        terms = []
+        for kind, a, b in _TERM.iter_unpack(memoryview(self._map)[self._terms:self._triples]):
+            if kind == TERM_RESTRICTION:
+                terms.append(Restriction((terms[a], terms[b])))
+            elif kind == TERM_LITERAL:
+                terms.append(Literal(strings[a]))
+            else:
+                terms.append(strings[a])
+        self._decoded = list(terms)
+        return terms
+
+    def triple_ids(self):
+        """逐个给出 (s, p, o) 项编号，不解码任何项。"""
+        end = self._triples + self.triple_count * _TRIPLE.size
+        return _TRIPLE.iter_unpack(memoryview(self._map)[self._triples:end])
+
+    def triples(self):
+        term = self.term
+        for s, p, o in self.triple_ids():
+            yield term(s), term(p), term(o)
+
+    def load(self):
+        """把全部三元组读入 TripleStore；写回 Turtle / RDF/XML 的结果与原 store 相同。"""
+        return TripleStore.from_ids(self.terms(), self.triple_ids())
+
+
+def load(path):
+    with OntologyFile(path) as f:
+        return f.load()
+
+
+def benchmark(binary_path, ttl_path, owl_path, repeat):
+    from lxml import etree
+    from visualize_ontology import parse_ttl
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    print(f"{'binary load':<24} {timed(lambda: load(binary_path)):8.2f} ms")
+    print(f"{'regex TTL scan':<24} {timed(lambda: parse_ttl(ttl_path)):8.2f} ms")
+    print(f"{'lxml RDF/XML parse':<24} {timed(lambda: etree.parse(str(owl_path))):8.2f} ms")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect a binary ontology file written by build_ontology.py.")
+    parser.add_argument("input", type=Path, nargs="?", default=ONTOLOGY_OUT_DIR / "sdformat_model.rdfb")
+    parser.add_argument("--ttl", type=Path, help="Convert back to Turtle at this path")
+    parser.add_argument("--owl", type=Path, help="Convert back to RDF/XML at this path")
+    parser.add_argument("--bench", action="store_true",
+                        help="Compare load time with parsing the Turtle / RDF/XML files next to the input")
+    parser.add_argument("--repeat", type=int, default=20, help="Benchmark repetitions")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = load(args.input)
+    print(f"Loaded {len(store)} triples from {args.input} in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if args.ttl or args.owl:
+        from build_ontology import write_turtle, write_rdfxml
+        if args.ttl:
+            write_turtle(store, args.ttl)
+        if args.owl:
+            write_rdfxml(store, args.owl)
+    if args.bench:
+        benchmark(args.input, args.input.with_suffix(".ttl"), args.input.with_suffix(".owl"), args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+from pathlib import Path
+
+from ontology_graph import Literal, Restriction
+from spec_hash import subtree_hashes
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+FRAGMENT_CACHE_DIR = PROJECT_ROOT / "data" / "cache" / "ontology"
+INDEX_NAME = "index.json"
+
+# build_graph 的输出规则或块的渲染方式变化时加一，使旧缓存整体失效
+FRAGMENT_VERSION = 1
+
+
+def fragment_keys(roots, tasks):
+    """各片段的缓存键：根类名 + 片段内容哈希。根类自身的片段只取决于根节点的名字与描述。
+
+    哈希总是由当前内容重新计算，不使用节点上保存的 hash 字段，手工修改 structure.json 后也能发现变化。
+    """
+    hashes = subtree_hashes([roots[i]["children"][j] for i, j in tasks if j is not None])
+    keys = []
+    for root_index, child_index in tasks:
+        root = roots[root_index]
+        if child_index is None:
+            keys.append(f"{root['name']}#{json.dumps(root.get('description', ''), ensure_ascii=False)}")
+        else:
+            keys.append(f"{root['name']}/{hashes[id(root['children'][child_index])]}")
+    return keys
+
+
+def _encode_term(term):
+    if isinstance(term, Literal):
+        return ["l", str(term)]
+    if isinstance(term, Restriction):
+        return ["r", term.on_property, term.some_values_from]
+    return term
+
+
+def _decode_term(item):
+    if isinstance(item, str):
+        return item
+    if item[0] == "l":
+        return Literal(item[1])
+    return Restriction((item[1], item[2]))
+
+
+class Fragment:
+    """一个片段：主语列表（同 TripleStore.subjects() 的顺序）、各主语的三元组与各输出格式渲染好的块。
+
+    从缓存读出的片段只在需要时才解码某个主语的三元组（通常只有出现在多个片段中的主语需要）。
+    """
+
+    __slots__ = ("subjects", "blocks", "_statements", "_encoded")
+
+    def __init__(self, subjects, blocks, statements, encoded=False):
+        self.subjects = subjects
+        self.blocks = blocks
+        self._statements = statements
+        self._encoded = encoded
+
+    @classmethod
+    def from_store(cls, store, renderers):
+        """由片段的 TripleStore 构造，renderers 为 {格式: 渲染函数(主语, 三元组)}。"""
+        grouped = store.subjects()
+        blocks = {fmt: [render(subject, statements) for subject, statements in grouped]
+                  for fmt, render in renderers.items()}
+        return cls([subject for subject, _ in grouped], blocks, [statements for _, statements in grouped])
+
+    def statements(self, index):
+        """第 index 个主语的 [(谓语, 宾语), ...]。"""
+        statements = self._statements[index]
+        if self._encoded:
+            return [(p, _decode_term(o)) for p, o in statements]
+        return statements
+
+    def to_json(self):
+        statements = self._statements if self._encoded else [
+            [[p, _encode_term(o)] for p, o in items] for items in self._statements]
+        return {"subjects": self.subjects, "statements": statements, "blocks": self.blocks}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["subjects"], data["blocks"], data["statements"], encoded=True)
+
+
+class FragmentCache:
+    """按片段缓存三元组与渲染好的输出块，每个片段一个文件，只有新片段需要写盘。
+
+    index.json 记录上次构建的片段键与输出文件：{"version", "keys", "outputs"}。
+    """
+
+    def __init__(self, root=FRAGMENT_CACHE_DIR):
+        self.root = Path(root)
+        self.previous_keys = []
+        self.previous_outputs = []
+        self._new = {}
+        try:
+            with open(self.root / INDEX_NAME, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == FRAGMENT_VERSION:
+                self.previous_keys = index["keys"]
+                self.previous_outputs = index["outputs"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def _path(self, key):
+        return self.root / "fragments" / (hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".json")
+
+    def get(self, key):
+        """缓存中的 Fragment；没有、版本不符或文件损坏时返回 None。"""
+        if key in self._new:
+            return self._new[key]
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get("version") != FRAGMENT_VERSION or data.get("key") != key:
+            return None
+        return Fragment.from_json(data)
+
+    def put(self, key, fragment):
+        self._new[key] = fragment
+
+    def save(self, keys, outputs):
+        """写出新片段与索引，删除不再使用的片段文件。"""
+        fragments_dir = self.root / "fragments"
+        fragments_dir.mkdir(parents=True, exist_ok=True)
+        for key, fragment in self._new.items():
+            with open(self._path(key), "w", encoding="utf-8") as f:
+                json.dump({"version": FRAGMENT_VERSION, "key": key, **fragment.to_json()},
+                          f, ensure_ascii=False, separators=(",", ":"))
+        used = {self._path(key).name for key in keys}
+        for path in fragments_dir.glob("*.json"):
+            if path.name not in used:
+                path.unlink()
+        with open(self.root / INDEX_NAME, "w", encoding="utf-8") as f:
+            json.dump({"version": FRAGMENT_VERSION, "keys": list(keys), "outputs": [str(p) for p in outputs]},
+                      f, ensure_ascii=False, indent=2)
+        self._new = {}
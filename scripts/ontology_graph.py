@@ -0,0 +1,242 @@
+import re
+
+from sdf_parser import node_details
+from spec_hash import subtree_hashes
+
+# 结构树 -> 本体三元组。只遍历一次结构树，Turtle / RDF/XML 等输出都从同一个 TripleStore 生成。
+BASE_IRI = "http://sdformat.org/spec/model"
+NAMESPACES = {
+    "": f"{BASE_IRI}#",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+    "xsd": "http://www.w3.org/2001/XMLSchema#",
+}
+XSD_IRI = NAMESPACES["xsd"]
+
+RDF_TYPE = NAMESPACES["rdf"] + "type"
+RDFS_LABEL = NAMESPACES["rdfs"] + "label"
+RDFS_COMMENT = NAMESPACES["rdfs"] + "comment"
+RDFS_DOMAIN = NAMESPACES["rdfs"] + "domain"
+RDFS_RANGE = NAMESPACES["rdfs"] + "range"
+RDFS_SUBCLASS_OF = NAMESPACES["rdfs"] + "subClassOf"
+OWL_ONTOLOGY = NAMESPACES["owl"] + "Ontology"
+OWL_IMPORTS = NAMESPACES["owl"] + "imports"
+OWL_CLASS = NAMESPACES["owl"] + "Class"
+OWL_OBJECT_PROPERTY = NAMESPACES["owl"] + "ObjectProperty"
+OWL_DATATYPE_PROPERTY = NAMESPACES["owl"] + "DatatypeProperty"
+OWL_RESTRICTION = NAMESPACES["owl"] + "Restriction"
+OWL_ON_PROPERTY = NAMESPACES["owl"] + "onProperty"
+OWL_SOME_VALUES_FROM = NAMESPACES["owl"] + "someValuesFrom"
+
+
+class Literal(str):
+    """字面量；与 IRI（普通 str）区分。"""
+    __slots__ = ()
+
+
+class Restriction(tuple):
+    """owl:someValuesFrom 限制（空白节点），内容相同的限制是同一个项：(属性 IRI, 值域类 IRI)。"""
+    __slots__ = ()
+
+    @property
+    def on_property(self):
+        return self[0]
+
+    @property
+    def some_values_from(self):
+        return self[1]
+
+
+class TripleStore:
+    """驻留（interned）项与去重的三元组集合。
+
+    IRI、字面量、限制各存一份，三元组是项编号的三元组；重复加入的三元组被忽略。
+    主语与三元组都保持首次加入的顺序，输出因此是确定的。
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.terms = []
+        self._triples = {}
+        self._by_subject = {}
+
+    def intern(self, term):
+        # 键里带上类型：文本相同的字面量与 IRI 是不同的项
+        key = (type(term), term)
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._ids[key] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def add(self, s, p, o):
+        key = (self.intern(s), self.intern(p), self.intern(o))
+        if key not in self._triples:
+            self._triples[key] = None
+            self._by_subject.setdefault(key[0], []).append(key)
+
+    @classmethod
+    def from_ids(cls, terms, triples):
+        """由互不相同的项列表与项编号三元组直接构造，不再逐项驻留（用于读取二进制文件）。"""
+        store = cls()
+        store.terms = list(terms)
+        store._ids = {(type(term), term): i for i, term in enumerate(store.terms)}
+        by_subject = store._by_subject
+        for key in triples:
+            if key not in store._triples:
+                store._triples[key] = None
+                by_subject.setdefault(key[0], []).append(key)
+        return store
+
+    def update(self, other):
+        """按 other 的顺序并入另一个 TripleStore 的全部三元组。"""
+        terms = other.terms
+        for s, p, o in other._triples:
+            self.add(terms[s], terms[p], terms[o])
+
+    def __len__(self):
+        return len(self._triples)
+
+    def lookup(self, term):
+        """项的编号；store 中没有这个项时返回 None。"""
+        return self._ids.get((type(term), term))
+
+    def __contains__(self, triple):
+        return tuple(self.lookup(term) for term in triple) in self._triples
+
+    def triple_ids(self):
+        return iter(self._triples)
+
+    def triples(self):
+        terms = self.terms
+        for s, p, o in self._triples:
+            yield terms[s], terms[p], terms[o]
+
+    def subjects(self):
+        """[(主语, [(谓语, 宾语), ...]), ...]，按主语首次出现的顺序。"""
+        terms = self.terms
+        return [(terms[s], [(terms[p], terms[o]) for _, p, o in keys]) for s, keys in self._by_subject.items()]
+
+
+def map_xsd_type(sdf_type):
+    sdf_type = sdf_type.lower()
+    if sdf_type == "bool" or sdf_type == "boolean":
+        return "xsd:boolean"
+    elif sdf_type == "string":
+        return "xsd:string"
+    elif sdf_type in ["int", "integer", "unsigned int"]:
+        return "xsd:integer"
+    elif sdf_type in ["double", "float"]:
+        return "xsd:double"
+    elif sdf_type == "vector3":
+        return "xsd:string" # 或者定义特定类型
+    elif sdf_type == "pose":
+        return "xsd:string" # "x y z r p y"
+    elif sdf_type == "color":
+        return "xsd:string"
+    elif sdf_type == "time":
+        return "xsd:string"
+    else:
+        return "xsd:string" # Default
+
+
+def xsd_prefixed_to_uri(xsd_prefixed):
+    if not xsd_prefixed.startswith("xsd:"):
+        return xsd_prefixed
+    local = xsd_prefixed.split(":", 1)[1]
+    return f"{XSD_IRI}{local}"
+
+
+def sanitize_local_name(name):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+
+def _add_text(store, subject, predicate, text):
+    text = str(text).strip() if text is not None else ""
+    if text:
+        store.add(subject, predicate, Literal(text))
+
+
+def fragment_tasks(roots):
+    """把结构树拆成可以独立构建的片段：[(根下标, None), (根下标, 子节点下标), ...]。
+
+    (i, None) 只产生根类自身的三元组，(i, j) 产生根 i 的第 j 个顶层子树的三元组；
+    按这个顺序依次并入同一个 TripleStore，结果与一次遍历整棵树完全相同。没有名字的根不产生片段。
+    """
+    tasks = []
+    for root_index, root in enumerate(roots):
+        if not root.get("name"):
+            continue
+        tasks.append((root_index, None))
+        tasks.extend((root_index, child_index) for child_index in range(len(root.get("children", []))))
+    return tasks
+
+
+def build_graph(roots, store=None, tasks=None, ontology=BASE_IRI):
+    """先序遍历结构树（显式栈），把本体三元组写入 TripleStore。
+
+    每个根元素成为一个类；有子节点的元素成为 父类_子元素 类，并通过 父类_has_子元素 对象属性与父类相连；
+    叶子元素与属性成为 DatatypeProperty。没有名字的节点（连同其子树）不产生三元组。
+    同一父类下内容相同（子树哈希相同）的子树产生的三元组完全相同，只遍历第一次出现的那一个。
+    tasks 为 fragment_tasks 的一部分时只构建这些片段（默认全部）；ontology 为 None 时不写本体头。
+    """
+    store = store if store is not None else TripleStore()
+    base = NAMESPACES[""]
+    if ontology is not None:
+        store.add(ontology, RDF_TYPE, OWL_ONTOLOGY)
+    tasks = fragment_tasks(roots) if tasks is None else tasks
+    used = [roots[i] if j is None else roots[i]["children"][j] for i, j in tasks]
+    # 总是重新计算：手工修改过的结构文件里，节点上保存的 hash 字段可能已经过期
+    digest = subtree_hashes(used)
+
+    visited = set()
+    for root_index, child_index in tasks:
+        root = roots[root_index]
+        root_class = root["name"].capitalize()
+        if child_index is None:
+            root_iri = base + root_class
+            store.add(root_iri, RDF_TYPE, OWL_CLASS)
+            _add_text(store, root_iri, RDFS_LABEL, root_class)
+            _add_text(store, root_iri, RDFS_COMMENT, root.get("description", ""))
+            continue
+        stack = [(root["children"][child_index], root_class)]
+        while stack:
+            node, parent_class = stack.pop()
+            node_name = node.get("name")
+            if not node_name:
+                continue
+            key = (parent_class, digest[id(node)])
+            if key in visited:
+                continue
+            visited.add(key)
+            description = node.get("description", "")
+            children = node.get("children", [])
+            parent_iri = base + parent_class
+            if children:
+                safe_node_name = node_name.capitalize()
+                class_name = f"{parent_class}_{safe_node_name}"
+                class_iri = base + class_name
+                prop_iri = base + sanitize_local_name(f"{parent_class}_has_{safe_node_name}")
+                store.add(class_iri, RDF_TYPE, OWL_CLASS)
+                _add_text(store, class_iri, RDFS_LABEL, safe_node_name)
+                _add_text(store, class_iri, RDFS_COMMENT, description)
+                store.add(class_iri, RDFS_SUBCLASS_OF, parent_iri)
+                store.add(prop_iri, RDF_TYPE, OWL_OBJECT_PROPERTY)
+                store.add(prop_iri, RDFS_DOMAIN, parent_iri)
+                store.add(prop_iri, RDFS_RANGE, class_iri)
+                _add_text(store, prop_iri, RDFS_LABEL, safe_node_name)
+                _add_text(store, prop_iri, RDFS_COMMENT, f"Property for {node_name} element")
+                store.add(parent_iri, RDFS_SUBCLASS_OF, Restriction((prop_iri, class_iri)))
+                stack.extend((child, class_name) for child in reversed(children))
+            else:
+                prop_name = f"{parent_class}_{node_name}"
+                if node.get("node_type") == "Attribute":
+                    prop_name += "_attr"
+                prop_iri = base + sanitize_local_name(prop_name)
+                store.add(prop_iri, RDF_TYPE, OWL_DATATYPE_PROPERTY)
+                store.add(prop_iri, RDFS_DOMAIN, parent_iri)
+                store.add(prop_iri, RDFS_RANGE, xsd_prefixed_to_uri(map_xsd_type(node_details(node).get("type", ""))))
+                _add_text(store, prop_iri, RDFS_LABEL, node_name)
+                _add_text(store, prop_iri, RDFS_COMMENT, description)
+    return store
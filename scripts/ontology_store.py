@@ -0,0 +1,219 @@
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+STRUCTURE_JSON_PATH = PROJECT_ROOT / "data" / "merged" / "structure.json"
+RDFB_PATH = PROJECT_ROOT / "outputs" / "ontology" / "sdformat_model.rdfb"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ontology_graph import (NAMESPACES, RDF_TYPE, RDFS_DOMAIN, RDFS_RANGE, RDFS_SUBCLASS_OF, OWL_CLASS,
+                            OWL_OBJECT_PROPERTY, OWL_DATATYPE_PROPERTY, Literal, Restriction, build_graph)
+
+
+def expand(term):
+    """查询里的项：Literal / Restriction 原样使用；"rdfs:domain"、"xsd:string" 按前缀展开；
+    不带前缀的名字（"Model_Link"）视为本体命名空间中的名字；完整 IRI 原样使用。"""
+    if isinstance(term, (Literal, Restriction)) or "://" in term:
+        return term
+    prefix, sep, local = term.partition(":")
+    if sep and prefix in NAMESPACES:
+        return NAMESPACES[prefix] + local
+    return NAMESPACES[""] + term
+
+
+def compact(term):
+    """expand 的逆操作，用于输出：本体命名空间中的名字去掉前缀，其余已知命名空间写成 prefix:local。"""
+    if isinstance(term, (Literal, Restriction)):
+        return term
+    base = NAMESPACES[""]
+    if term.startswith(base):
+        return term[len(base):]
+    for prefix, uri in NAMESPACES.items():
+        if prefix and term.startswith(uri):
+            return f"{prefix}:{term[len(uri):]}"
+    return term
+
+
+def default_source():
+    """load_default 读取的文件：.rdfb 不存在或比 structure.json 旧时回退到 structure.json。"""
+    if not RDFB_PATH.exists():
+        return STRUCTURE_JSON_PATH
+    if STRUCTURE_JSON_PATH.exists() and STRUCTURE_JSON_PATH.stat().st_mtime > RDFB_PATH.stat().st_mtime:
+        return STRUCTURE_JSON_PATH
+    return RDFB_PATH
+
+
+class OntologyStore:
+    """带 SPO / POS / OSP 三个索引的只读三元组存储。
+
+    索引是 {项编号: {项编号: [项编号, ...]}}，任意绑定方式的模式查询都是两次字典查找加一次列表遍历，
+    结果保持三元组加入 TripleStore 的顺序。
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self.terms = store.terms
+        self._spo = {}
+        self._pos = {}
+        self._osp = {}
+        for s, p, o in store.triple_ids():
+            self._spo.setdefault(s, {}).setdefault(p, []).append(o)
+            self._pos.setdefault(p, {}).setdefault(o, []).append(s)
+            self._osp.setdefault(o, {}).setdefault(s, []).append(p)
+
+    @classmethod
+    def load(cls, path=RDFB_PATH):
+        """由 build_ontology.py 的二进制输出（.rdfb）或结构文件（.json，现场构建三元组）创建。"""
+        path = Path(path)
+        if path.suffix == ".rdfb":
+            from ontology_binary import load
+            return cls(load(path))
+        from spec_tree import load_tree
+        return cls(build_graph(load_tree(path)))
+
+    @classmethod
+    def load_default(cls):
+        """优先读取构建输出的 .rdfb；还没有生成、或比 structure.json 旧（未重新构建）时由 structure.json 构建。"""
+        source = default_source()
+        print(f"Loading ontology from {source}")
+        return cls.load(source)
+
+    def __len__(self):
+        return len(self._store)
+
+    def _id(self, term):
+        return None if term is None else self._store.lookup(expand(term))
+
+    def match(self, s=None, p=None, o=None):
+        """按模式 (s, p, o) 查询，None 为通配；项的写法见 expand。返回 [(s, p, o), ...]。"""
+        bound = [term is not None for term in (s, p, o)]
+        s_id, p_id, o_id = self._id(s), self._id(p), self._id(o)
+        if any(b and i is None for b, i in zip(bound, (s_id, p_id, o_id))):
+            return []
+        terms = self.terms
+        if s_id is not None:
+            if o_id is not None:
+                ids = [(s_id, pp, o_id) for pp in self._osp.get(o_id, {}).get(s_id, [])
+                       if p_id is None or pp == p_id]
+            elif p_id is not None:
+                ids = [(s_id, p_id, oo) for oo in self._spo.get(s_id, {}).get(p_id, [])]
+            else:
+                ids = [(s_id, pp, oo) for pp, objects in self._spo.get(s_id, {}).items() for oo in objects]
+        elif p_id is not None:
+            by_object = self._pos.get(p_id, {})
+            if o_id is not None:
+                ids = [(ss, p_id, o_id) for ss in by_object.get(o_id, [])]
+            else:
+                ids = [(ss, p_id, oo) for oo, subjects in by_object.items() for ss in subjects]
+        elif o_id is not None:
+            ids = [(ss, pp, o_id) for ss, predicates in self._osp.get(o_id, {}).items() for pp in predicates]
+        else:
+            ids = list(self._store.triple_ids())
+        return [(terms[a], terms[b], terms[c]) for a, b, c in ids]
+
+    def subjects(self, p, o):
+        return [s for s, _, _ in self.match(None, p, o)]
+
+    def objects(self, s, p):
+        return [o for _, _, o in self.match(s, p, None)]
+
+    def value(self, s, p, default=None):
+        objects = self.objects(s, p)
+        return objects[0] if objects else default
+
+    def instances_of(self, type_iri):
+        return self.subjects(RDF_TYPE, type_iri)
+
+    def classes(self):
+        return self.instances_of(OWL_CLASS)
+
+    def object_properties(self):
+        return self.instances_of(OWL_OBJECT_PROPERTY)
+
+    def datatype_properties(self):
+        return self.instances_of(OWL_DATATYPE_PROPERTY)
+
+    def properties_with_domain(self, cls, kind=None):
+        """domain 为 cls 的属性；kind 为 OWL_DATATYPE_PROPERTY / OWL_OBJECT_PROPERTY 时只返回该类属性。"""
+        properties = self.subjects(RDFS_DOMAIN, cls)
+        if kind is None:
+            return properties
+        return [prop for prop in properties if self.match(prop, RDF_TYPE, kind)]
+
+    def subclasses(self, cls):
+        """直接子类（rdfs:subClassOf cls）。"""
+        return self.subjects(RDFS_SUBCLASS_OF, cls)
+
+    def validate(self):
+        """检查属性的 domain / range 与 subClassOf 的目标都是已声明的类，返回问题列表。"""
+        classes = set(self.classes())
+        problems = []
+        for kind, check_range in ((OWL_OBJECT_PROPERTY, True), (OWL_DATATYPE_PROPERTY, False)):
+            for prop in self.instances_of(kind):
+                domains = self.objects(prop, RDFS_DOMAIN)
+                ranges = self.objects(prop, RDFS_RANGE)
+                if not domains or any(d not in classes for d in domains):
+                    problems.append(f"{compact(prop)}: domain {[compact(d) for d in domains]} is not a declared class")
+                if not ranges:
+                    problems.append(f"{compact(prop)}: no range")
+                elif check_range and any(r not in classes for r in ranges):
+                    problems.append(f"{compact(prop)}: range {[compact(r) for r in ranges]} is not a declared class")
+        for cls in classes:
+            for parent in self.objects(cls, RDFS_SUBCLASS_OF):
+                if isinstance(parent, Restriction):
+                    if parent.some_values_from not in classes:
+                        problems.append(f"{compact(cls)}: restriction on undeclared class {compact(parent.some_values_from)}")
+                elif parent not in classes:
+                    problems.append(f"{compact(cls)}: subClassOf undeclared class {compact(parent)}")
+        return problems
+
+
+def _show(term):
+    if isinstance(term, Restriction):
+        return f"[{compact(term.on_property)} some {compact(term.some_values_from)}]"
+    if isinstance(term, Literal):
+        return f'"{term}"'
+    return compact(term)
+
+
+def _parse_pattern(text):
+    """"? rdfs:domain Model_Link" -> (None, "rdfs:domain", "Model_Link")；"?" 为通配。"""
+    parts = text.split()
+    if len(parts) != 3:
+        raise ValueError(f"pattern needs three terms: {text!r}")
+    return tuple(None if part == "?" else part for part in parts)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Query the generated ontology through an indexed triple store.")
+    parser.add_argument("input", type=Path, nargs="?",
+                        help="sdformat_model.rdfb or a structure .json (default: the .rdfb if built, else structure.json)")
+    parser.add_argument("--query", action="append", default=[],
+                        help='Triple pattern with ? as wildcard, e.g. "? rdfs:domain Model_Link" or "? rdfs:subClassOf Model_Link"')
+    parser.add_argument("--check", action="store_true", help="Report properties and subclasses that refer to undeclared classes")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = OntologyStore.load(args.input) if args.input else OntologyStore.load_default()
+    print(f"Loaded {len(store)} triples in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for text in args.query:
+        start = time.perf_counter()
+        results = store.match(*_parse_pattern(text))
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{text}: {len(results)} result(s) ({elapsed:.3f} ms)")
+        for triple in results:
+            print("  " + " ".join(_show(term) for term in triple))
+
+    if args.check:
+        problems = store.validate()
+        for problem in problems:
+            print(f"  {problem}")
+        print(f"{len(problems)} problem(s)")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
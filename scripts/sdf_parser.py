@@ -0,0 +1,452 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+
+# 所有脚本共用的规范页面解析模块。
+# 后端：
+#   html.parser  逐标签解析整页（参考实现）
+#   fast         先用正则定位 tree well 区域，只扫描这些片段（正则切分标签，不走 HTMLParser）
+#   lxml         在 fast 的基础上用 libxml2（C 实现）解析片段，需要安装 lxml
+# 三者输出完全一致，scripts/bench_parser.py 负责校验并测速。
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    lxml_etree = None
+
+_REQUIRED = re.compile(r"Required:\s*(\S+)")
+_TYPE = re.compile(r"Type:\s*(.*?)(?:Default:|$)")
+_DEFAULT = re.compile(r"Default:\s*(.*)")
+
+
+def split_details(raw):
+    """把 "Required: 1 Type: string Default: __default__" 拆成 {required, type, default}。"""
+    # Example: "\n Required:  1 Type:  string Default:  __default__ \n "
+    info = {}
+    req_match = _REQUIRED.search(raw)
+    if req_match:
+        info["required"] = req_match.group(1)
+    type_match = _TYPE.search(raw)
+    if type_match:
+        info["type"] = type_match.group(1).strip()
+    def_match = _DEFAULT.search(raw)
+    if def_match:
+        info["default"] = def_match.group(1).strip()
+    return info
+
+
+DETAIL_FIELDS = ("required", "type", "default")
+
+
+def node_details(node):
+    """节点的 {required, type, default}：新格式直接读字段，旧格式（只有 details_raw）回退到正则。
+
+    缺失的字段一律为 ""（与 SDFParser 的初值相同），没有 details 块的节点在新旧格式下结果一致。
+    """
+    details = node if "type" in node else split_details(node.get("details_raw", ""))
+    return {key: details.get(key) or "" for key in DETAIL_FIELDS}
+
+
+# 基于 html.parser 的参考实现：逐个标签回调，只在 tree well 内构建结构树
+class SDFParser(HTMLParser):
+    def __init__(self, keep_raw=False):
+        super().__init__()
+        self.keep_raw = keep_raw # 是否在节点中保留原始的 details_raw 文本
+        self.stack = [] 
+        self.root_list = []
+        self.stack.append(self.root_list)
+        
+        self.current_item = None
+        self.in_h5 = False
+        self.in_small = False
+        self.in_details = False
+        self.in_description = False
+        self.buffers = {"name": "", "type": "", "details": "", "description": ""}
+        self.capture_mode = False
+        self.div_level = 0
+        self.tree_well_depth = 0 # 记录 tree well 的 div 深度
+        self.finished = False # tree well 已经结束，后面的内容不再需要
+
+    def handle_starttag(self, tag, attrs):
+        # 只有 div 需要看 class，其它标签不必构造 dict(attrs)
+        class_list = ()
+        if tag == "div":
+            for key, value in attrs:
+                if key == "class":
+                    class_list = (value or "").split()
+
+        if tag == "div":
+            if "tree" in class_list and "well" in class_list:
+                if not self.capture_mode:
+                    self.capture_mode = True
+                    self.tree_well_depth = self.div_level
+            self.div_level += 1
+
+        if not self.capture_mode:
+            return
+
+        if tag == "ul":
+            # 进入子列表
+            # 只有当 current_item 存在时，ul 才是它的 children
+            # 但是 HTML 结构可能是 li -> ul
+            if self.current_item:
+                new_list = self.current_item["children"]
+                self.stack.append(new_list)
+            else:
+                pass
+
+        elif tag == "li":
+            # 新的项
+            self.current_item = {
+                "node_type": "Element", # 默认为 Element，稍后修正
+                "name": "",
+                "required": "",
+                "type": "",
+                "default": "",
+            }
+            if self.keep_raw:
+                self.current_item["details_raw"] = ""
+            self.current_item["description"] = ""
+            self.current_item["children"] = []
+            self.stack[-1].append(self.current_item)
+            
+            # 清空 buffers
+            for k in self.buffers:
+                self.buffers[k] = ""
+
+        elif tag == "h5":
+            self.in_h5 = True
+
+        elif tag == "small":
+            self.in_small = True
+
+        elif tag == "div":
+            if "col-xs-4" in class_list:
+                self.in_details = True
+            elif "col-xs-8" in class_list:
+                self.in_description = True
+
+    def handle_endtag(self, tag):
+        if tag == "div":
+            self.div_level -= 1
+            if self.capture_mode and self.div_level == self.tree_well_depth:
+                self.capture_mode = False
+                self.finished = True
+            
+            if self.in_details:
+                self.in_details = False
+                if self.current_item:
+                    # 在抽取时就拆成 required / type / default，下游不必再跑正则
+                    self.current_item.update(split_details(self.buffers["details"]))
+                    if self.keep_raw:
+                        self.current_item["details_raw"] = self.buffers["details"]
+            
+            if self.in_description:
+                self.in_description = False
+                if self.current_item:
+                    desc = self.buffers["description"].strip()
+                    if desc.startswith("Description:"):
+                        desc = desc[len("Description:"):].strip()
+                    self.current_item["description"] = desc
+
+        elif tag == "ul":
+            if self.capture_mode:
+                if len(self.stack) > 1:
+                    self.stack.pop()
+
+        elif tag == "li":
+            # 结束当前项，但在 tree view 中，li 包含 ul，所以 li 结束意味着其子树也结束
+            # 我们不需要在这里做特别的操作，因为 item 已经在 list 中了
+            # 只需要确定 current_item 不再指向它（防止后续误操作，虽然后续是新的 li）
+            pass
+
+        elif tag == "h5":
+            self.in_h5 = False
+            if self.current_item:
+                raw_name = self.buffers["name"].strip()
+                # 移除 < 和 >
+                raw_name = raw_name.replace("<", "").replace(">", "")
+                
+                # 区分 Attribute (@name) 和 Element (name)
+                if raw_name.startswith("@"):
+                    self.current_item["node_type"] = "Attribute"
+                    self.current_item["name"] = raw_name[1:]
+                else:
+                    self.current_item["node_type"] = "Element"
+                    self.current_item["name"] = raw_name
+
+        elif tag == "small":
+            self.in_small = False
+
+    def handle_data(self, data):
+        if not self.capture_mode:
+            return
+
+        if self.in_small:
+            self.buffers["type"] += data
+        elif self.in_h5:
+            self.buffers["name"] += data
+
+        if self.in_details:
+            self.buffers["details"] += data + " "
+
+        if self.in_description:
+            self.buffers["description"] += data
+
+_DIV_TAG = re.compile(r"<(/?)div\b[^>]*>", re.IGNORECASE)
+_CLASS_ATTR = re.compile(r"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+
+
+def _is_tree_well(tag_text):
+    m = _CLASS_ATTR.search(tag_text)
+    if not m:
+        return False
+    classes = (m.group(1) or m.group(2) or m.group(3) or "").split()
+    return "tree" in classes and "well" in classes
+
+
+def tree_well_regions(content):
+    """返回所有 tree well div（含自身起止标签）在页面中的 (start, end) 区间。"""
+    if "well" not in content:
+        return []
+    regions = []
+    depth = 0
+    start = None
+    start_depth = 0
+    for m in _DIV_TAG.finditer(content):
+        tag_text = m.group(0)
+        if m.group(1):
+            depth -= 1
+            if start is not None and depth == start_depth:
+                regions.append((start, m.end()))
+                start = None
+        elif not tag_text.endswith("/>"):
+            if start is None and "well" in tag_text and _is_tree_well(tag_text):
+                start = m.start()
+                start_depth = depth
+            depth += 1
+    if start is not None:
+        # 页面被截断，tree well 没有闭合：把剩余部分都交给解析器
+        regions.append((start, len(content)))
+    return regions
+
+
+def _parse_html_parser(content, keep_raw=False):
+    parser = SDFParser(keep_raw)
+    parser.feed(content)
+    return parser.root_list
+
+
+_TOKEN = re.compile(
+    r"""<(/?)([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>|<!--.*?-->|<![^>]*>""",
+    re.DOTALL,
+)
+_ATTR = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+_RAW_TEXT_TAGS = ("script", "style")
+
+
+def _scan_region(parser, region):
+    """用正则切分标签与文本，直接调用 SDFParser 的回调，跳过 HTMLParser 的逐字符状态机。
+
+    按 html.parser 的约定：标签名小写、文本与属性值做字符引用转换、<x/> 触发 start+end、
+    script/style 的内容原样作为文本。
+    """
+    handle_starttag = parser.handle_starttag
+    handle_endtag = parser.handle_endtag
+    handle_data = parser.handle_data
+    pos = 0
+    n = len(region)
+    while pos < n:
+        m = _TOKEN.search(region, pos)
+        if m is None:
+            handle_data(unescape(region[pos:]))
+            break
+        if m.start() > pos:
+            handle_data(unescape(region[pos:m.start()]))
+        pos = m.end()
+        tag = m.group(2)
+        if tag is None:
+            continue  # 注释 / 声明
+        tag = tag.lower()
+        if m.group(1):
+            handle_endtag(tag)
+            continue
+        attr_text = m.group(3)
+        attrs = []
+        if tag == "div":
+            for a in _ATTR.finditer(attr_text):
+                value = a.group(2)
+                if value is None:
+                    value = a.group(3) if a.group(3) is not None else a.group(4)
+                attrs.append((a.group(1).lower(), unescape(value) if value is not None else None))
+        handle_starttag(tag, attrs)
+        if attr_text.rstrip().endswith("/"):
+            handle_endtag(tag)
+        elif tag in _RAW_TEXT_TAGS:
+            close = re.compile(rf"</{tag}\s*>", re.IGNORECASE).search(region, pos)
+            end = close.start() if close else n
+            if end > pos:
+                handle_data(region[pos:end])
+            pos = end
+
+
+def _parse_fast(content, keep_raw=False):
+    parser = SDFParser(keep_raw)
+    for start, end in tree_well_regions(content):
+        _scan_region(parser, content[start:end])
+    return parser.root_list
+
+
+class _LxmlTarget:
+    """把 lxml 的解析事件转发给 SDFParser 的回调。
+
+    相邻的文本事件合并后再交给 handle_data，与 html.parser 每段文本回调一次的行为一致。
+    """
+
+    def __init__(self, parser):
+        self.parser = parser
+        self.text = []
+
+    def _flush(self):
+        if self.text:
+            self.parser.handle_data("".join(self.text))
+            self.text = []
+
+    def start(self, tag, attrib):
+        self._flush()
+        self.parser.handle_starttag(tag, list(attrib.items()))
+
+    def end(self, tag):
+        self._flush()
+        self.parser.handle_endtag(tag)
+
+    def data(self, data):
+        self.text.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self.parser
+
+
+def _parse_lxml(content, keep_raw=False):
+    parser = SDFParser(keep_raw)
+    for start, end in tree_well_regions(content):
+        target = _LxmlTarget(parser)
+        lxml_parser = lxml_etree.HTMLParser(target=target)
+        lxml_parser.feed(content[start:end])
+        lxml_parser.close()
+    return parser.root_list
+
+
+BACKENDS = {
+    "html.parser": _parse_html_parser,
+    "fast": _parse_fast,
+}
+if lxml_etree is not None:
+    BACKENDS["lxml"] = _parse_lxml
+
+# 默认优先使用 C 加速的后端
+DEFAULT_BACKEND = "lxml" if "lxml" in BACKENDS else "fast"
+_default_backend = DEFAULT_BACKEND
+_keep_raw_details = False
+
+
+def set_default_backend(name):
+    global _default_backend
+    if name == "auto":
+        name = DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable parser backend {name!r}; available: {', '.join(BACKENDS)}")
+    _default_backend = name
+
+
+def set_keep_raw_details(keep_raw):
+    global _keep_raw_details
+    _keep_raw_details = bool(keep_raw)
+
+
+def parser_settings():
+    """当前的后端与 keep_raw 设置（传给子进程时需要显式带上）。"""
+    return {"backend": _default_backend, "keep_raw": _keep_raw_details}
+
+
+def add_parser_arguments(parser):
+    parser.add_argument("--parser", default="auto", choices=["auto", "html.parser", "fast", "lxml"],
+                        help="HTML parser backend (auto = lxml if installed, else fast)")
+    parser.add_argument("--keep-raw-details", action="store_true",
+                        help="Also store the unparsed details_raw text next to required/type/default")
+
+
+def configure_from_args(args):
+    set_default_backend(args.parser)
+    set_keep_raw_details(args.keep_raw_details)
+
+
+def parse_tree(content, backend=None, keep_raw=None):
+    """解析页面中的 tree well，返回顶层节点列表（即 SDFParser.root_list）。"""
+    if keep_raw is None:
+        keep_raw = _keep_raw_details
+    return BACKENDS[backend or _default_backend](content, keep_raw)
+
+
+def parse_structure(content, element_name, backend=None, keep_raw=None):
+    """解析已下载的页面 HTML，返回 element_name 的结构（与 extract_structure_from_url 相同）。"""
+    return select_roots(parse_tree(content, backend, keep_raw), element_name)
+
+def parse_structure_stream(chunks, element_name):
+    """边下载边解析：chunks 是解码后的文本块，tree well 结束后立即停止读取。
+
+    只在 '<' 之前切分喂给 parser，保证文本节点不会被拆成两次 handle_data
+    （details_raw 会在每段文本后补空格），结果与 parse_structure 完全一致。
+    """
+    parser = SDFParser(_keep_raw_details)
+    pending = ""
+    try:
+        for chunk in chunks:
+            pending += chunk
+            cut = pending.rfind("<")
+            if cut > 0:
+                parser.feed(pending[:cut])
+                pending = pending[cut:]
+            if parser.finished:
+                break
+        else:
+            parser.feed(pending)
+    finally:
+        # 提前退出时关闭生成器，释放底层连接
+        if hasattr(chunks, "close"):
+            chunks.close()
+    return select_roots(parser.root_list, element_name)
+
+def select_roots(root_list, element_name):
+    # 修正：有些页面可能直接列出属性，没有外层包裹，或者结构略有不同
+    # 但 SDF 网站通常结构一致
+    
+    # 后处理：根节点通常是我们要的元素（例如 link），但 parser 可能会抓取到它的父容器或者直接是列表
+    # root_list 通常包含一个或多个顶层元素
+    
+    # 验证：根节点应该是 element_name
+    result = []
+    for item in root_list:
+        if item["name"] == element_name:
+            result.append(item)
+        else:
+            # 有时页面会包含一些导航或其他 tree well，需要过滤
+            # 但根据经验，主要 tree well 包含该元素
+            if item["name"] == element_name:
+                result.append(item)
+    
+    # 如果没找到，可能 root_list 就是那个列表，里面包含属性
+    # 实际上，parser 会把 <div class="tree well"><ul><li>...</li></ul></div> 解析出来
+    # 根通常是 element_name 本身
+    
+    if not result and root_list:
+        # 尝试查找匹配的
+        for item in root_list:
+             if item.get("name") == element_name:
+                 return [item]
+    
+    return root_list
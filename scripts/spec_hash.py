@@ -0,0 +1,75 @@
+import hashlib
+import json
+
+from sdf_parser import node_details
+
+# 每个节点的 "hash" 字段：节点自身内容与子节点哈希自底向上计算的 Merkle 哈希，
+# 两棵子树哈希相同即内容相同，可作为跨阶段、跨版本的缓存键
+HASH_FIELD = "hash"
+HASH_LENGTH = 16  # 保留的十六进制位数（64 位）
+
+
+def node_hash(node, child_hashes):
+    """由节点自身字段与子节点哈希计算哈希。
+
+    required/type/default 经 node_details 取得，新旧两种格式得到相同的哈希；
+    details_raw 只是原始文本（是否保留取决于 --keep-raw-details），不参与计算。
+    """
+    details = node_details(node)
+    payload = [
+        node.get("node_type", "Element"),
+        node.get("name", ""),
+        details["required"],
+        details["type"],
+        details["default"],
+        node.get("description", ""),
+        "children" in node,
+        child_hashes,
+    ]
+    data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def subtree_hashes(nodes):
+    """计算所有节点的哈希，返回 {id(node): hash}。迭代后序遍历，共享的子树只计算一次；不修改节点。"""
+    hashes = {}
+    stack = [(node, False) for node in reversed(nodes)]
+    while stack:
+        node, ready = stack.pop()
+        if id(node) in hashes:
+            continue
+        children = node.get("children", [])
+        if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children if id(child) not in hashes)
+            continue
+        hashes[id(node)] = node_hash(node, [hashes[id(child)] for child in children])
+    return hashes
+
+
+def subtree_hash(node):
+    """单个子树的哈希，总是按当前内容重新计算。
+
+    节点上的 hash 字段只是写出时的快照：手工修改过的文件、或旧版 node_hash 写出的文件中可能与内容不符，
+    用作缓存键时会把有变化的子树当作未变化。
+    """
+    return subtree_hashes([node])[id(node)]
+
+
+def annotate(nodes):
+    """把哈希写入每个节点的 hash 字段（放在 children 之前），已有的值会被重新计算覆盖。"""
+    hashes = subtree_hashes(nodes)
+    seen = set()
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        children = node.pop("children", None)
+        node[HASH_FIELD] = hashes[id(node)]
+        if children is not None:
+            node["children"] = children
+            stack.extend(children)
+    return nodes
+
@@ -0,0 +1,62 @@
+from html.parser import HTMLParser
+
+import http_client
+
+SPEC_BASE_URL = "https://sdformat.org/spec"
+# sdformat.org 上已发布的规范版本（按顺序），用于展开 "1.9-1.12" 这样的范围
+SPEC_VERSIONS = ["1.0", "1.2", "1.3", "1.4", "1.5", "1.6", "1.7", "1.8", "1.9", "1.10", "1.11", "1.12"]
+
+
+def version_url(version):
+    return f"{SPEC_BASE_URL}/{version}/"
+
+
+def expand_versions(specs):
+    """把命令行里的版本参数展开成版本列表。
+
+    支持单个版本 "1.9"、逗号列表 "1.9,1.12"、范围 "1.9-1.12" 以及 "all"。
+    结果去重并保持给出的顺序。
+    """
+    versions = []
+    for spec in specs:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if part == "all":
+                versions.extend(SPEC_VERSIONS)
+            elif "-" in part:
+                start, end = (p.strip() for p in part.split("-", 1))
+                if start not in SPEC_VERSIONS or end not in SPEC_VERSIONS:
+                    raise ValueError(f"Unknown version in range {part!r}; known: {', '.join(SPEC_VERSIONS)}")
+                i, j = SPEC_VERSIONS.index(start), SPEC_VERSIONS.index(end)
+                if i > j:
+                    i, j = j, i
+                versions.extend(SPEC_VERSIONS[i:j + 1])
+            else:
+                versions.append(part)
+    return list(dict.fromkeys(versions))
+
+
+def get_all_element_names(base_url):
+    try:
+        content = http_client.fetch_text(base_url)
+
+        links = set()
+        class LinkParser(HTMLParser):
+            def handle_starttag(self, tag, attrs):
+                if tag == "a":
+                    href = dict(attrs).get("href")
+                    # Filter for simple element names
+                    # They should be just words like "world", "model"
+                    # Exclude "index.html", "style.css", relative paths, etc.
+                    if href and not href.startswith(".") and not href.startswith("http") and "#" not in href and "/" not in href:
+                         if not href.endswith(".html") and not href.endswith(".css") and not href.endswith(".js"):
+                            links.add(href)
+
+        parser = LinkParser()
+        parser.feed(content)
+        return list(links)
+    except Exception as e:
+        print(f"Error fetching index: {e}")
+        return []
@@ -0,0 +1,119 @@
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+STRUCTURE_JSON_PATH = PROJECT_ROOT / "data" / "merged" / "structure.json"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from structure_dag import load_structure
+
+# 结构树节点的全部字段，顺序即 JSON 中键的顺序
+FIELDS = ("node_type", "name", "required", "type", "default", "details_raw", "description", "hash", "children")
+_MISSING = object()
+
+
+class SpecNode:
+    """结构树节点的紧凑表示：__slots__ 代替每个节点一个 dict，字符串字段全部 intern。
+
+    提供 dict 的只读接口（get / [] / in / items），build_ontology.py 等按 dict 读取节点的代码可以直接使用。
+    JSON 里没有的字段保持缺失，to_dict() 输出的键与原文件一致。
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, **fields):
+        for key in FIELDS:
+            value = fields.get(key, _MISSING)
+            if isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, _MISSING) if key in FIELDS else _MISSING
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return [key for key in FIELDS if key in self]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.keys()]
+
+    def __repr__(self):
+        return f"SpecNode({self.get('node_type')!r}, {self.get('name')!r}, {len(self.get('children', []))} children)"
+
+    def to_dict(self):
+        node = {key: value for key, value in self.items() if key != "children"}
+        if "children" in self:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+
+def from_dicts(nodes):
+    """dict 结构树 -> SpecNode 结构树。输入中共享的子树（见 structure_dag）转换后仍然共享。"""
+    converted = {}
+
+    def convert(node):
+        key = id(node)
+        if key not in converted:
+            fields = {k: v for k, v in node.items() if k != "children"}
+            if "children" in node:
+                fields["children"] = [convert(child) for child in node["children"]]
+            converted[key] = SpecNode(**fields)
+        return converted[key]
+
+    return [convert(node) for node in nodes]
+
+
+def to_dicts(nodes):
+    return [node.to_dict() for node in nodes]
+
+
+def load_tree(path):
+    """读取 structure.json（展开形式或 $ref 紧凑形式），返回 SpecNode 列表。"""
+    return from_dicts(load_structure(path))
+
+
+def save_tree(path, nodes):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(to_dicts(nodes), f, indent=2, ensure_ascii=False)
+
+
+def _measure(load):
+    tracemalloc.start()
+    nodes = load()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return nodes, current
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare the memory used by a structure file loaded as dicts and as SpecNode objects.")
+    parser.add_argument("paths", type=Path, nargs="*", default=[STRUCTURE_JSON_PATH])
+    args = parser.parse_args()
+
+    ok = True
+    for path in args.paths:
+        with open(path, "r", encoding="utf-8") as f:
+            original = f.read()
+        dicts, dict_bytes = _measure(lambda: json.loads(original))
+        nodes, node_bytes = _measure(lambda: from_dicts(json.loads(original)))
+        same = json.dumps(to_dicts(nodes), indent=2, ensure_ascii=False) == json.dumps(dicts, indent=2, ensure_ascii=False)
+        ok = ok and same
+        print(f"{path.name}: dict {dict_bytes / 1024:.0f} KiB, SpecNode {node_bytes / 1024:.0f} KiB "
+              f"({node_bytes / dict_bytes:.0%}), round trip {'identical' if same else 'DIFFERS'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
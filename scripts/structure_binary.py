@@ -0,0 +1,241 @@
+import json
+import mmap
+import struct
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MERGED_DIR = PROJECT_ROOT / "data" / "merged"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from structure_dag import load_structure, share_tree, dump_expanded
+
+# 文件布局（小端）：
+#   头部       MAGIC, 版本, 字符串数, 节点数, 根节点数, 子节点索引数
+#   字符串表   (字符串数 + 1) 个 u32 偏移，随后是 UTF-8 数据
+#   节点表     每个节点 NODE_FIELDS 个 u32 字符串编号 + 子节点起始位置 u32 + 子节点数 u32
+#   子节点索引 u32 节点编号；每个节点的子节点连续存放
+#   根节点     u32 节点编号
+# 内容相同的子树（structure_dag 共享后的 DAG）只存一份，可以被多个父节点引用。
+MAGIC = b"SDFB"
+FORMAT_VERSION = 2
+NODE_FIELDS = ("node_type", "name", "required", "type", "default", "details_raw", "description", "hash")
+MISSING = 0xFFFFFFFF  # 字段缺失；用作子节点数时表示没有 children 键
+
+_HEADER = struct.Struct("<4s5I")
+_NODE = struct.Struct(f"<{len(NODE_FIELDS) + 2}I")
+_U32 = struct.Struct("<I")
+
+
+def _align(buf):
+    buf.extend(b"\0" * (-len(buf) % 4))
+
+
+def encode(nodes):
+    """结构树（dict 或 SpecNode）-> 二进制内容。"""
+    nodes = share_tree(nodes)
+    strings = {}
+    node_ids = {}
+    order = []
+    stack = list(reversed(nodes))
+    # 先序编号：父节点在前，子树连续，按路径读取时局部性更好
+    while stack:
+        node = stack.pop()
+        if id(node) in node_ids:
+            continue
+        node_ids[id(node)] = len(order)
+        order.append(node)
+        stack.extend(reversed(node.get("children", [])))
+
+    def string_id(value):
+        if value is None:
+            return MISSING
+        return strings.setdefault(value, len(strings))
+
+    records = []
+    child_index = []
+    for node in order:
+        fields = [string_id(node[key]) if key in node else MISSING for key in NODE_FIELDS]
+        if "children" in node:
+            children = node["children"]
+            fields += [len(child_index), len(children)]
+            child_index.extend(node_ids[id(child)] for child in children)
+        else:
+            fields += [0, MISSING]
+        records.append(fields)
+
+    blobs = [s.encode("utf-8") for s in strings]
+    buf = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(blobs), len(records), len(nodes), len(child_index)))
+    offset = 0
+    for blob in blobs:
+        buf += _U32.pack(offset)
+        offset += len(blob)
+    buf += _U32.pack(offset)
+    for blob in blobs:
+        buf += blob
+    _align(buf)
+    for fields in records:
+        buf += _NODE.pack(*fields)
+    buf += struct.pack(f"<{len(child_index)}I", *child_index)
+    buf += struct.pack(f"<{len(nodes)}I", *(node_ids[id(node)] for node in nodes))
+    return bytes(buf)
+
+
+class StructureFile:
+    """通过 mmap 读取二进制结构文件；只有被访问到的节点与字符串才会被解码。"""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n_strings, n_nodes, n_roots, n_children = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a structure file (version {FORMAT_VERSION})")
+        self._str_offsets = _HEADER.size
+        self._str_data = self._str_offsets + (n_strings + 1) * 4
+        data_end = self._str_data + _U32.unpack_from(self._map, self._str_offsets + n_strings * 4)[0]
+        self._nodes = data_end + (-data_end % 4)
+        self._children = self._nodes + n_nodes * _NODE.size
+        self._roots = self._children + n_children * 4
+        self.node_count = n_nodes
+        self.root_count = n_roots
+        self._strings = {}
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, index):
+        if index == MISSING:
+            return None
+        value = self._strings.get(index)
+        if value is None:
+            start, end = struct.unpack_from("<2I", self._map, self._str_offsets + index * 4)
+            value = self._map[self._str_data + start:self._str_data + end].decode("utf-8")
+            self._strings[index] = value
+        return value
+
+    def roots(self):
+        return list(struct.unpack_from(f"<{self.root_count}I", self._map, self._roots))
+
+    def _record(self, index):
+        return _NODE.unpack_from(self._map, self._nodes + index * _NODE.size)
+
+    def name(self, index):
+        return self.string(self._record(index)[1])
+
+    def children(self, index):
+        """子节点编号列表；没有 children 键时返回 None。"""
+        start, count = self._record(index)[-2:]
+        if count == MISSING:
+            return None
+        return list(struct.unpack_from(f"<{count}I", self._map, self._children + start * 4))
+
+    def find(self, path):
+        """按 "model/link/sensor" 这样的名称路径查找节点编号，只读取路径上的节点；找不到返回 None。"""
+        candidates = self.roots()
+        index = None
+        for part in path.strip("/").split("/"):
+            index = next((i for i in candidates or [] if self.name(i) == part), None)
+            if index is None:
+                return None
+            candidates = self.children(index)
+        return index
+
+    def materialize(self, index, memo=None):
+        """把一个节点及其子树解码成 dict；同一个文件内共享的子树解码后仍然共享。"""
+        memo = {} if memo is None else memo
+        if index in memo:
+            return memo[index]
+        record = self._record(index)
+        node = {key: self.string(value) for key, value in zip(NODE_FIELDS, record) if value != MISSING}
+        children = self.children(index)
+        if children is not None:
+            node["children"] = [self.materialize(child, memo) for child in children]
+        memo[index] = node
+        return node
+
+    def load(self):
+        memo = {}
+        return [self.materialize(root, memo) for root in self.roots()]
+
+
+def convert_to_binary(json_path, binary_path):
+    data = encode(load_structure(json_path))
+    with open(binary_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+def convert_to_json(binary_path, json_path):
+    with StructureFile(binary_path) as sf:
+        text = dump_expanded(sf.load())
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return len(text.encode("utf-8"))
+
+
+def benchmark(json_path, binary_path, subtree, repeat):
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def json_subtree():
+        with open(json_path, "r", encoding="utf-8") as f:
+            nodes = json.load(f)
+        for part in subtree.strip("/").split("/"):
+            node = next(n for n in nodes if n.get("name") == part)
+            nodes = node.get("children", [])
+        return node
+
+    def binary_subtree():
+        with StructureFile(binary_path) as sf:
+            return sf.materialize(sf.find(subtree))
+
+    def binary_full():
+        with StructureFile(binary_path) as sf:
+            return sf.load()
+
+    same = json_subtree() == binary_subtree()
+    print(f"{'json.load + walk':<24} {timed(json_subtree):8.2f} ms")
+    print(f"{'mmap subtree':<24} {timed(binary_subtree):8.2f} ms")
+    print(f"{'mmap full load':<24} {timed(binary_full):8.2f} ms")
+    print(f"subtree {subtree}: {'identical' if same else 'DIFFERS'}")
+    return same
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert structure files between JSON and the memory-mappable binary format.")
+    parser.add_argument("input", type=Path, nargs="?", default=MERGED_DIR / "structure.json",
+                        help="A .json file is converted to binary, a .sdfb file back to JSON")
+    parser.add_argument("-o", "--output", type=Path, help="Output file (default: input with the other extension)")
+    parser.add_argument("--bench", metavar="PATH", help="After converting, compare load times for the subtree at PATH (e.g. model/link/sensor)")
+    parser.add_argument("--repeat", type=int, default=20, help="Benchmark repetitions")
+    args = parser.parse_args()
+
+    if args.input.suffix == ".sdfb":
+        output = args.output or args.input.with_suffix(".json")
+        size = convert_to_json(args.input, output)
+        json_path, binary_path = output, args.input
+    else:
+        output = args.output or args.input.with_suffix(".sdfb")
+        size = convert_to_binary(args.input, output)
+        json_path, binary_path = args.input, output
+    print(f"Saved {output} ({size} bytes)")
+
+    if args.bench and not benchmark(json_path, binary_path, args.bench, args.repeat):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
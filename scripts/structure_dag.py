@@ -0,0 +1,162 @@
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MERGED_DIR = PROJECT_ROOT / "data" / "merged"
+REF_PREFIX = "#/$defs/"
+
+
+class NodeTable:
+    """哈希共享（hash-consing）节点表：内容相同的子树在内存中只保留一个 dict。
+
+    节点仍是普通 dict，下游按树遍历的代码无需修改；只是同一个子树对象可能出现在多个父节点下，
+    因此共享后的节点不能再原地修改。
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self.requests = 0
+
+    def intern(self, node):
+        """node 的 children 必须已经是共享后的节点。"""
+        self.requests += 1
+        # 没有 children 键与 children 为空列表要区分，否则展开输出会变
+        children = tuple(id(c) for c in node["children"]) if "children" in node else None
+        key = (tuple((k, v) for k, v in node.items() if k != "children"), children)
+        shared = self._nodes.get(key)
+        if shared is None:
+            # 同时持有 children 引用，保证 id 在表的生命周期内不被复用
+            self._nodes[key] = shared = node
+        return shared
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+def share_tree(nodes, table=None):
+    """把普通结构树转换成共享子树的 DAG（自底向上，迭代实现）。"""
+    table = table if table is not None else NodeTable()
+    done = {}
+    stack = [(node, False) for node in reversed(nodes)]
+    while stack:
+        node, ready = stack.pop()
+        if id(node) in done:
+            continue
+        children = node.get("children", [])
+        if not ready:
+            stack.append((node, True))
+            stack.extend((child, False) for child in children if id(child) not in done)
+            continue
+        copy = {k: v for k, v in node.items() if k != "children"}
+        if "children" in node:
+            copy["children"] = [done[id(child)] for child in children]
+        done[id(node)] = table.intern(copy)
+    return [done[id(node)] for node in nodes]
+
+
+def count_nodes(nodes):
+    """(展开后的节点数, 不同节点对象数)。"""
+    expanded = {}
+
+    def size(node):
+        key = id(node)
+        if key not in expanded:
+            expanded[key] = 1 + sum(size(child) for child in node.get("children", []))
+        return expanded[key]
+
+    total = sum(size(node) for node in nodes)
+    return total, len(expanded)
+
+
+def dump_expanded(nodes):
+    """完全展开的形式，与现有 structure.json 逐字节一致。"""
+    return json.dumps(nodes, indent=2, ensure_ascii=False)
+
+
+def to_compact(nodes):
+    """紧凑形式：被多处引用的子树只写一次，放在 $defs 里，其余位置写 {"$ref": "#/$defs/<n>"}。"""
+    refcount = {}
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        refcount[id(node)] = refcount.get(id(node), 0) + 1
+        if refcount[id(node)] == 1:
+            stack.extend(node.get("children", []))
+
+    defs = {}
+    names = {}
+
+    def emit(node):
+        key = id(node)
+        if key in names:
+            return {"$ref": REF_PREFIX + names[key]}
+        out = {k: v for k, v in node.items() if k != "children"}
+        if "children" in node:
+            out["children"] = [emit(child) for child in node["children"]]
+        if refcount[key] > 1 and node.get("children"):
+            names[key] = str(len(defs))
+            defs[names[key]] = out
+            return {"$ref": REF_PREFIX + names[key]}
+        return out
+
+    roots = [emit(node) for node in nodes]
+    return {"$defs": defs, "roots": roots}
+
+
+def from_compact(data):
+    """把紧凑形式还原成共享子树的 DAG；$defs 中的每一项只构造一次。"""
+    defs = data.get("$defs", {})
+    built = {}
+
+    def build(item):
+        ref = item.get("$ref")
+        if ref is not None:
+            name = ref[len(REF_PREFIX):]
+            if name not in built:
+                built[name] = build(defs[name])
+            return built[name]
+        node = {k: v for k, v in item.items() if k != "children"}
+        if "children" in item:
+            node["children"] = [build(child) for child in item["children"]]
+        return node
+
+    return [build(item) for item in data["roots"]]
+
+
+def is_compact(data):
+    return isinstance(data, dict) and "roots" in data
+
+
+def load_structure(path):
+    """读取 structure.json；展开形式和紧凑形式都接受，返回节点列表。"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return from_compact(data) if is_compact(data) else data
+
+
+def save_structure(path, nodes, compact=False):
+    with open(path, "w", encoding="utf-8") as f:
+        if compact:
+            json.dump(to_compact(nodes), f, indent=2, ensure_ascii=False)
+        else:
+            f.write(dump_expanded(nodes))
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert a structure file between the expanded form and the compact $ref form.")
+    parser.add_argument("input", type=Path, nargs="?", default=MERGED_DIR / "structure.json")
+    parser.add_argument("-o", "--output", type=Path, help="Output file (default: <input>_compact.json, or <input>_expanded.json with --expand)")
+    parser.add_argument("--expand", action="store_true", help="Write the fully expanded form instead of the compact form")
+    args = parser.parse_args()
+
+    nodes = share_tree(load_structure(args.input))
+    output = args.output or args.input.with_name(args.input.stem + ("_expanded.json" if args.expand else "_compact.json"))
+    save_structure(output, nodes, compact=not args.expand)
+    total, distinct = count_nodes(nodes)
+    print(f"{total} nodes, {distinct} distinct ({args.input.stat().st_size} -> {output.stat().st_size} bytes)")
+    print(f"Saved {output}")
+
+if __name__ == "__main__":
+    sys.exit(main())
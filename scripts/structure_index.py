@@ -0,0 +1,181 @@
+import bisect
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+MERGED_DIR = PROJECT_ROOT / "data" / "merged"
+STRUCTURE_JSON_PATH = MERGED_DIR / "structure.json"
+INDEX_PATH = MERGED_DIR / "structure_index.json"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sdf_parser import node_details
+from structure_dag import load_structure
+
+INDEX_VERSION = 1
+
+
+def node_path(parent_path, node):
+    """XPath 风格的路径：元素 /model/link/sensor，属性 /model/link/@name。"""
+    name = node.get("name", "")
+    if node.get("node_type", "Element") == "Attribute":
+        name = "@" + name
+    return f"{parent_path}/{name}"
+
+
+def build_index(nodes):
+    """遍历一次结构树，生成 {路径: 节点摘要} 以及元素名、属性名到路径的映射。
+
+    同一路径出现多次时（规范里很少见）只保留第一次出现的节点。
+    """
+    paths = {}
+    elements = {}
+    attributes = {}
+    stack = [("", node) for node in reversed(nodes)]
+    while stack:
+        parent_path, node = stack.pop()
+        path = node_path(parent_path, node)
+        if path in paths:
+            continue
+        children = node.get("children", [])
+        entry = {"node_type": node.get("node_type", "Element"), "name": node.get("name", "")}
+        entry.update(node_details(node))
+        if "hash" in node:
+            entry["hash"] = node["hash"]
+        entry["children"] = [node_path(path, child) for child in children]
+        paths[path] = entry
+        names = attributes if entry["node_type"] == "Attribute" else elements
+        names.setdefault(entry["name"], []).append(path)
+        stack.extend((path, child) for child in reversed(children))
+    return {"version": INDEX_VERSION, "paths": paths, "elements": elements, "attributes": attributes}
+
+
+def structure_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_index(structure_path=STRUCTURE_JSON_PATH, index_path=INDEX_PATH):
+    """由 structure.json 生成索引文件，记录源文件哈希以便判断是否过期。"""
+    index = build_index(load_structure(structure_path))
+    index["source_sha256"] = structure_digest(structure_path)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    return index
+
+
+class StructureIndex:
+    """结构树的路径索引与查询接口。
+
+    精确路径、元素名、属性名的查询是一次字典查找；前缀与后缀查询在排好序的路径表上二分。
+    """
+
+    def __init__(self, index):
+        self._paths = index["paths"]
+        self._elements = index["elements"]
+        self._attributes = index["attributes"]
+        self._sorted = sorted(self._paths)
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        return cls(build_index(nodes))
+
+    @classmethod
+    def load(cls, structure_path=STRUCTURE_JSON_PATH, index_path=INDEX_PATH):
+        """读取预先生成的索引；索引缺失、版本不符或与 structure.json 不一致时重新生成。"""
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION and index.get("source_sha256") == structure_digest(structure_path):
+                return cls(index)
+        except (FileNotFoundError, ValueError):
+            pass
+        print(f"Rebuilding {index_path}")
+        return cls(write_index(structure_path, index_path))
+
+    def __len__(self):
+        return len(self._paths)
+
+    def __contains__(self, path):
+        return _normalize(path) in self._paths
+
+    def node(self, path):
+        """路径对应节点的摘要 {node_type, name, required, type, default, [hash], children}；不存在时返回 None。"""
+        return self._paths.get(_normalize(path))
+
+    def children(self, path):
+        entry = self.node(path)
+        return list(entry["children"]) if entry else []
+
+    def child_elements(self, path):
+        return [child for child in self.children(path) if self._paths[child]["node_type"] == "Element"]
+
+    def attributes_of(self, path):
+        return [child for child in self.children(path) if self._paths[child]["node_type"] == "Attribute"]
+
+    def elements_named(self, name):
+        """名为 name 的元素出现的所有路径。"""
+        return list(self._elements.get(name, []))
+
+    def attributes_named(self, name):
+        """名为 name 的属性出现的所有路径（/.../@name）。"""
+        return list(self._attributes.get(name, []))
+
+    def elements_with_attribute(self, name):
+        """带有名为 name 的属性的元素路径。"""
+        return [path.rsplit("/", 1)[0] for path in self._attributes.get(name, [])]
+
+    def descendants(self, path):
+        """path 子树中的所有路径（不含 path 自身），按路径排序。"""
+        prefix = _normalize(path) + "/"
+        start = bisect.bisect_left(self._sorted, prefix)
+        end = bisect.bisect_left(self._sorted, prefix[:-1] + "0")  # "0" 是 "/" 之后的下一个字符
+        return self._sorted[start:end]
+
+    def find(self, pattern):
+        """"/model/link" 为精确路径；"//sensor/camera" 匹配以 /sensor/camera 结尾的所有路径。"""
+        if not pattern.startswith("//"):
+            return [_normalize(pattern)] if pattern in self else []
+        suffix = "/" + pattern[2:].strip("/")
+        last = suffix.rsplit("/", 1)[1]
+        if last.startswith("@"):
+            candidates = self._attributes.get(last[1:], [])
+        else:
+            candidates = self._elements.get(last, [])
+        return [path for path in candidates if path.endswith(suffix)]
+
+
+def _normalize(path):
+    return "/" + path.strip("/")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the path index next to structure.json and run queries against it.")
+    parser.add_argument("structure", type=Path, nargs="?", default=STRUCTURE_JSON_PATH)
+    parser.add_argument("-o", "--output", type=Path, help="Index file (default: structure_index.json next to the structure)")
+    parser.add_argument("--query", action="append", default=[],
+                        help="Path (/model/link), suffix pattern (//sensor/camera), or @name to list elements with that attribute")
+    args = parser.parse_args()
+
+    index_path = args.output or args.structure.with_name("structure_index.json")
+    if args.query:
+        index = StructureIndex.load(args.structure, index_path)
+    else:
+        index = StructureIndex(write_index(args.structure, index_path))
+        print(f"Indexed {len(index)} paths -> {index_path}")
+
+    for query in args.query:
+        if query.startswith("@"):
+            results = index.elements_with_attribute(query[1:])
+        else:
+            results = []
+            for path in index.find(query):
+                results.extend(index.children(path))
+        print(f"{query}: {len(results)} result(s)")
+        for path in results:
+            print(f"  {path}")
+
+if __name__ == "__main__":
+    main()
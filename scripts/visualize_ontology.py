@@ -1,10 +1,14 @@
 import re
 import json
+import sys
 from collections import deque, defaultdict
 from pathlib import Path
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
-TTL_PATH = PROJECT_ROOT / "outputs" / "ontology" / "sdformat_model.ttl"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ontology_graph import RDFS_DOMAIN, RDFS_RANGE
+from ontology_store import OntologyStore, compact
 HTML_OUT = PROJECT_ROOT / "outputs" / "html" / "ontology_graph.html"
 
 
@@ -67,6 +71,21 @@ def parse_ttl(path):
     return classes, obj_props, dt_props
 
 
+def ontology_data(store):
+    """从 OntologyStore 取出与 parse_ttl 相同形式的 (类, 对象属性, 数据属性)，不再扫描 TTL 文本。"""
+    classes = {compact(c) for c in store.classes()}
+    props = []
+    for kind in (store.object_properties(), store.datatype_properties()):
+        items = []
+        for prop in kind:
+            dom = store.value(prop, RDFS_DOMAIN)
+            ran = store.value(prop, RDFS_RANGE)
+            if dom and ran:
+                items.append({"name": compact(prop), "domain": compact(dom), "range": compact(ran)})
+        props.append(items)
+    return classes, props[0], props[1]
+
+
 def build_layers(classes, obj_props):
     adj = defaultdict(list)
     indeg = defaultdict(int)
@@ -194,7 +213,7 @@ svg {{ background: #fff; }}
 
 
 def main():
-    classes, obj_props, dt_props = parse_ttl(TTL_PATH)
+    classes, obj_props, dt_props = ontology_data(OntologyStore.load_default())
     ordered_layers, layer_map = build_layers(classes, obj_props)
     positions, width, height, node_w, node_h = compute_positions(ordered_layers)
     make_html(classes, obj_props, dt_props, positions, width, height, node_w, node_h)